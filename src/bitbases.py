@@ -0,0 +1,59 @@
+# bitbases.py
+#
+# Generates the KPK, KRK and KQK endgame bitbases ChessAI probes (see
+# engine/bitbase.py), or looks a position up in them:
+#
+#   python -m src.bitbases generate
+#   python -m src.bitbases generate --dir /var/cache/kingpin --no-dtm
+#   python -m src.bitbases probe --fen "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"
+
+import argparse
+import sys
+import time
+
+from src.board.bitboard import COLORS
+from src.board.chess_board import ChessBoard
+from src.engine.bitbase import Bitbases, DEFAULT_DIRECTORY, generate_all
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or probe KingPin's endgame bitbases")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="solve and write the tables that are missing")
+    generate.add_argument('--dir', default=DEFAULT_DIRECTORY, help="table directory (default: assets/bitbases)")
+    generate.add_argument('--no-dtm', action='store_true',
+                          help="write only the 1-bit win/draw tables, not the distance-to-mate bytes")
+
+    probe = commands.add_parser('probe', help="look a position up")
+    probe.add_argument('--dir', default=DEFAULT_DIRECTORY, help="table directory (default: assets/bitbases)")
+    probe.add_argument('--fen', required=True, help="position with two kings and one pawn, rook or queen")
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        start = time.perf_counter()
+        generate_all(args.dir, not args.no_dtm,
+                     report=lambda name: print(f"solving {name}...", flush=True))
+        print(f"tables in {args.dir} up to date ({time.perf_counter() - start:.1f}s)")
+        return 0
+
+    board = ChessBoard()
+    board.set_fen(args.fen)
+    bitbases = Bitbases(args.dir)
+    table_hit = bitbases.probe(board)
+    bitbases.close()
+    if table_hit is None:
+        print("not covered by the tables")
+        return 1
+    strong, win, distance = table_hit
+    if not win:
+        print("draw")
+    elif distance is None:
+        print(f"{COLORS[strong]} wins")
+    else:
+        print(f"{COLORS[strong]} mates in {distance} plies")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
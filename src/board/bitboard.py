@@ -0,0 +1,187 @@
+# board/bitboard.py
+#
+# Squares are numbered row * 8 + col, matching the (row, col) positions used
+# everywhere else: square 0 is a8, square 63 is h1.
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLORS = ('white', 'black')
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+COLOR_INDEX = {color: index for index, color in enumerate(COLORS)}
+TYPE_INDEX = {piece_type: index for index, piece_type in enumerate(PIECE_TYPES)}
+
+# One bitboard per (color, type): white pawn = 0 ... white king = 5, black pawn = 6 ... black king = 11
+PIECE_INDEX = {
+    (color, piece_type): COLOR_INDEX[color] * 6 + TYPE_INDEX[piece_type]
+    for color in COLORS for piece_type in PIECE_TYPES
+}
+
+FULL_BOARD = (1 << 64) - 1
+
+# Castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING_RIGHTS = 15
+
+SQUARE_MASKS = [1 << sq for sq in range(64)]
+POSITIONS = [divmod(sq, 8) for sq in range(64)]
+FILE_MASKS = [sum(1 << (row * 8 + col) for row in range(8)) for col in range(8)]
+RANK_MASKS = [0xFF << (row * 8) for row in range(8)]
+ADJACENT_FILE_MASKS = [
+    (FILE_MASKS[col - 1] if col > 0 else 0) | (FILE_MASKS[col + 1] if col < 7 else 0)
+    for col in range(8)
+]
+
+
+# Rights that survive a move touching a square: moving or capturing on a king or rook
+# home square gives up the matching rights for good
+CASTLING_MASKS = [ALL_CASTLING_RIGHTS] * 64
+CASTLING_MASKS[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)  # e1
+CASTLING_MASKS[63] &= ~WHITE_KINGSIDE  # h1
+CASTLING_MASKS[56] &= ~WHITE_QUEENSIDE  # a1
+CASTLING_MASKS[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)  # e8
+CASTLING_MASKS[7] &= ~BLACK_KINGSIDE  # h8
+CASTLING_MASKS[0] &= ~BLACK_QUEENSIDE  # a8
+
+
+def square(row, col):
+    return row * 8 + col
+
+
+def position(sq):
+    return divmod(sq, 8)
+
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    return bb.bit_length() - 1
+
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _offset_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _offset_table([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _offset_table([(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc])
+# Squares a pawn of the given color attacks from each square (white moves towards row 0)
+PAWN_ATTACKS = [
+    _offset_table([(-1, -1), (-1, 1)]),
+    _offset_table([(1, -1), (1, 1)]),
+]
+
+# Ray directions as (row delta, col delta)
+NORTH, SOUTH, EAST, WEST = (-1, 0), (1, 0), (0, 1), (0, -1)
+NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = (-1, 1), (-1, -1), (1, 1), (1, -1)
+DIRECTIONS = (NORTH, SOUTH, EAST, WEST, NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+
+def _ray(sq, direction):
+    row, col = divmod(sq, 8)
+    dr, dc = direction
+    mask = 0
+    row, col = row + dr, col + dc
+    while 0 <= row < 8 and 0 <= col < 8:
+        mask |= 1 << (row * 8 + col)
+        row, col = row + dr, col + dc
+    return mask
+
+
+RAYS = {direction: [_ray(sq, direction) for sq in range(64)] for direction in DIRECTIONS}
+
+# Rays running towards higher square numbers stop at their lowest blocker, the others at their highest
+_ROOK_POSITIVE_RAYS = (RAYS[SOUTH], RAYS[EAST])
+_ROOK_NEGATIVE_RAYS = (RAYS[NORTH], RAYS[WEST])
+_BISHOP_POSITIVE_RAYS = (RAYS[SOUTH_EAST], RAYS[SOUTH_WEST])
+_BISHOP_NEGATIVE_RAYS = (RAYS[NORTH_EAST], RAYS[NORTH_WEST])
+
+
+def rook_attacks(sq, occupied):
+    attacks = 0
+    for rays in _ROOK_POSITIVE_RAYS:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in _ROOK_NEGATIVE_RAYS:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(sq, occupied):
+    attacks = 0
+    for rays in _BISHOP_POSITIVE_RAYS:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in _BISHOP_NEGATIVE_RAYS:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def queen_attacks(sq, occupied):
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+# Everything a rook / bishop on each square could reach on an empty board; a slider
+# off these lines can never attack the square, whatever the occupancy
+ORTHOGONAL_LINES = [rook_attacks(sq, 0) for sq in range(64)]
+DIAGONAL_LINES = [bishop_attacks(sq, 0) for sq in range(64)]
+
+
+def _between(a, b):
+    for direction in DIRECTIONS:
+        ray = RAYS[direction][a]
+        if ray & (1 << b):
+            return ray & ~RAYS[direction][b] & ~(1 << b)
+    return 0
+
+
+# Squares strictly between two squares on a shared rank, file or diagonal (0 otherwise)
+BETWEEN = [[_between(a, b) for b in range(64)] for a in range(64)]
+
+
+def _passed_pawn_mask(sq, color):
+    row, col = divmod(sq, 8)
+    rows = range(row) if color == WHITE else range(row + 1, 8)
+    ahead = 0
+    for r in rows:
+        ahead |= RANK_MASKS[r]
+    return ahead & (FILE_MASKS[col] | ADJACENT_FILE_MASKS[col])
+
+
+# Squares in front of a pawn on its own and adjacent files; no enemy pawn there means it is passed
+PASSED_PAWN_MASKS = [[_passed_pawn_mask(sq, color) for sq in range(64)] for color in (WHITE, BLACK)]
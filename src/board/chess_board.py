@@ -1,39 +1,224 @@
 import copy
 
-from src.pieces.chess_piece import ChessPiece
+from src.pieces.chess_piece import PIECES
 from src.board.move_validator import MoveValidator
+from src.board.move_generator import MoveGenerator
 from src.board.game_state import GameState
 from src.board.game_rules import GameRules
+from src.board.bitboard import (
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PIECE_INDEX, COLOR_INDEX, ALL_CASTLING_RIGHTS, CASTLING_MASKS,
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, ORTHOGONAL_LINES, DIAGONAL_LINES,
+    rook_attacks, bishop_attacks, iter_bits, lsb
+)
+from src.board.piece_square import MATERIAL_VALUES, PIECE_SQUARE_VALUES
+from src.board.zobrist import PIECE_KEYS, CASTLING_KEYS, SIDE_KEY, compute_hash, compute_pawn_hash, en_passant_key
+from src.board.move import (
+    DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, EN_PASSANT, PROMOTION, NULL_MOVE, to_tuple, from_tuple
+)
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# Plies of undo information allocated up front; the stack doubles when a game gets longer
+UNDO_STACK_SIZE = 256
+
+# FEN letters for the piece codes, and back
+PIECE_LETTERS = 'PNBRQKpnbrqk'
+PIECE_LETTER_CODES = {letter: code for code, letter in enumerate(PIECE_LETTERS)}
 
 class ChessBoard:
     def __init__(self):
-        self.board = [[None for _ in range(8)] for _ in range(8)]
+        # Piece code (color * 6 + type, see bitboard.py) on each square, None when empty
+        self.squares = [None] * 64
+        # Bitboard view of the same position, kept in sync with self.squares
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.king_squares = [None, None]
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        # Zobrist key of the position, updated move by move, and one covering only the pawns
+        self.hash = 0
+        self.pawn_hash = 0
+        # Running material and piece-square totals per color
+        self.material = [0, 0]
+        self.pst = [0, 0]
         self.game_state = GameState()
         self.move_validator = MoveValidator(self)
+        self.move_generator = MoveGenerator(self)
         self.game_rules = GameRules(self)
-        self._setup_board()
         self.move_history = []
+        # The last move played with move_piece() or apply_move(), as a 16-bit int
         self.last_move = None
         self.last_double_pawn_move = None
+        # The position the game started from, for anything that replays move_history
+        self.initial_fen = STARTING_FEN
+        # Moves since the last capture or pawn move (the fifty-move rule counter)
+        self.halfmove_clock = 0
+        self._reset_undo_stack()
+        self._setup_board()
 
     def _setup_board(self):
         # Set up pawns
         for col in range(8):
-            self.board[6][col] = ChessPiece('white', 'pawn')  # White pawns on row 6
-            self.board[1][col] = ChessPiece('black', 'pawn')  # Black pawns on row 1
+            self.squares[48 + col] = PIECE_INDEX['white', 'pawn']  # White pawns on row 6
+            self.squares[8 + col] = PIECE_INDEX['black', 'pawn']   # Black pawns on row 1
         
         # Set up other pieces
         back_row = ['rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook']
         for col, piece in enumerate(back_row):
-            self.board[7][col] = ChessPiece('white', piece)   # White pieces on row 7
-            self.board[0][col] = ChessPiece('black', piece)   # Black pieces on row 0
+            self.squares[56 + col] = PIECE_INDEX['white', piece]   # White pieces on row 7
+            self.squares[col] = PIECE_INDEX['black', piece]        # Black pieces on row 0
+
+        self._sync_state()
+
+    def set_fen(self, fen):
+        # Load a position from FEN; missing trailing fields (as in EPD) fall back to '- - 0 1'
+        # A malformed FEN raises ValueError and leaves the board as it was
+        fields = fen.split()
+        if len(fields) < 2 or fields[1] not in ('w', 'b'):
+            raise ValueError(f"invalid FEN {fen!r}")
+        placement, turn = fields[0], fields[1]
+        castling = fields[2] if len(fields) > 2 else '-'
+        en_passant = fields[3] if len(fields) > 3 else '-'
+        if en_passant != '-' and en_passant[0] not in 'abcdefgh':
+            raise ValueError(f"invalid FEN {fen!r}")
+        halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        full_move = int(fields[5]) if len(fields) > 5 else 1
+
+        squares = [None] * 64
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f"invalid FEN {fen!r}")
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char in '12345678':
+                    col += int(char)
+                    continue
+                if char not in PIECE_LETTER_CODES or col > 7:
+                    raise ValueError(f"invalid FEN {fen!r}")
+                squares[row * 8 + col] = PIECE_LETTER_CODES[char]
+                col += 1
+            if col != 8:
+                raise ValueError(f"invalid FEN {fen!r}")
+        if squares.count(PIECE_LETTER_CODES['K']) != 1 or squares.count(PIECE_LETTER_CODES['k']) != 1:
+            raise ValueError(f"invalid FEN {fen!r}")
+        self.squares = squares
+
+        # A right only counts while its king and rook are still at home
+        self.castling_rights = 0
+        for char, right, king_sq, rook_sq in (('K', 1, 60, 63), ('Q', 2, 60, 56), ('k', 4, 4, 7), ('q', 8, 4, 0)):
+            color = 6 if char.islower() else 0
+            if char in castling and self.squares[king_sq] == color + KING and self.squares[rook_sq] == color + ROOK:
+                self.castling_rights |= right
+
+        self.game_state = GameState()
+        self.game_state.current_turn = 'white' if turn == 'w' else 'black'
+        self.game_state.move_count = 2 * (full_move - 1) + (turn != 'w')
+
+        # The board remembers the pawn that double-stepped rather than the square behind it
+        self.last_double_pawn_move = None
+        if en_passant != '-':
+            col = ord(en_passant[0]) - ord('a')
+            self.last_double_pawn_move = (3, col) if turn == 'w' else (4, col)
+
+        self.halfmove_clock = halfmove_clock
+        self.initial_fen = fen
+        self.move_history = []
+        self.last_move = None
+        self._reset_undo_stack()
+        self._sync_state()
+
+    def get_fen(self):
+        ranks = []
+        for row in range(8):
+            rank, empty = '', 0
+            for code in self.squares[row * 8:row * 8 + 8]:
+                if code is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += PIECE_LETTERS[code]
+            ranks.append(rank + (str(empty) if empty else ''))
+
+        turn = self.game_state.get_current_turn()
+        castling = ''.join(char for char, right in (('K', 1), ('Q', 2), ('k', 4), ('q', 8))
+                           if self.castling_rights & right) or '-'
+        en_passant = '-'
+        if self.last_double_pawn_move:
+            row, col = self.last_double_pawn_move
+            # The square the pawn skipped over, one row behind it
+            en_passant = chr(ord('a') + col) + str(8 - (row - 1 if row == 3 else row + 1))
+        full_move = self.game_state.get_move_count() // 2 + 1
+        return f"{'/'.join(ranks)} {turn[0]} {castling} {en_passant} {self.halfmove_clock} {full_move}"
+
+    def _sync_state(self):
+        # Rebuild everything derived from self.squares from scratch
+
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.material = [0, 0]
+        self.pst = [0, 0]
+        for sq, index in enumerate(self.squares):
+            if index is not None:
+                color = index // 6
+                self.bitboards[index] |= 1 << sq
+                self.occupancy[color] |= 1 << sq
+                self.material[color] += MATERIAL_VALUES[index]
+                self.pst[color] += PIECE_SQUARE_VALUES[index][sq]
+        self.occupied = self.occupancy[0] | self.occupancy[1]
+        self.king_squares = [lsb(self.bitboards[color * 6 + KING]) if self.bitboards[color * 6 + KING] else None
+                             for color in (0, 1)]
+        self.hash = compute_hash(self)
+        self.pawn_hash = compute_pawn_hash(self)
+
+    def _place_piece(self, sq, index):
+        self.squares[sq] = index
+        color = index // 6
+        mask = 1 << sq
+        self.bitboards[index] |= mask
+        self.occupancy[color] |= mask
+        self.occupied |= mask
+        self.hash ^= PIECE_KEYS[index][sq]
+        if index == 0 or index == 6:
+            self.pawn_hash ^= PIECE_KEYS[index][sq]
+        elif index == 5 or index == 11:
+            self.king_squares[color] = sq
+        self.material[color] += MATERIAL_VALUES[index]
+        self.pst[color] += PIECE_SQUARE_VALUES[index][sq]
+
+    def _remove_piece(self, sq):
+        # Returns the code of the piece that was there, or None
+        index = self.squares[sq]
+        if index is not None:
+            self.squares[sq] = None
+            color = index // 6
+            mask = ~(1 << sq)
+            self.bitboards[index] &= mask
+            self.occupancy[color] &= mask
+            self.occupied &= mask
+            self.hash ^= PIECE_KEYS[index][sq]
+            if index == 0 or index == 6:
+                self.pawn_hash ^= PIECE_KEYS[index][sq]
+            self.material[color] -= MATERIAL_VALUES[index]
+            self.pst[color] -= PIECE_SQUARE_VALUES[index][sq]
+        return index
+
+    def _finish_move(self, start_sq, end_sq, old_en_passant_key):
+        # Pieces are already in place: update castling rights, side to move and the hash
+        rights = self.castling_rights & CASTLING_MASKS[start_sq] & CASTLING_MASKS[end_sq]
+        self.hash ^= old_en_passant_key ^ CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[rights] ^ SIDE_KEY
+        self.castling_rights = rights
+        self.game_state.switch_turn()
+        self.hash ^= en_passant_key(self)
 
     def print_board(self):
         print()
         for row in range(8):
             print(f"{8 - row} ", end="")
             for col in range(8):
-                piece = self.board[row][col]
+                piece = self.get_piece((row, col))
                 print(f"{str(piece) if piece else '..'} ", end="")
             print()
         print("  a  b  c  d  e  f  g  h")
@@ -49,7 +234,7 @@ class ChessBoard:
         if self.game_rules.is_in_check(current_turn):
             print(f"{current_turn.capitalize()} is in check!")
 
-    def move_piece(self, start, end, log=True):
+    def move_piece(self, start, end, log=True, promotion='queen'):
         moving_piece = self.get_piece(start)
         
         if not moving_piece:
@@ -63,212 +248,298 @@ class ChessBoard:
                 print(f"It's not {moving_piece.color}'s turn! Current turn: {current_turn}")
             return False
 
-        if moving_piece.type == 'king' and abs(start[1] - end[1]) == 2:
-            if not self._handle_castling(start, end):
-                return False
-            
-        elif moving_piece.type == 'pawn' and abs(start[1] - end[1]) == 1 and self.get_piece(end) is None:
-            if not self._handle_en_passant(start, end):
-                return False
-
-        # Check if the current player is in check
-        if self.game_rules.is_in_check(current_turn):
-            valid_moves = self.game_rules.get_valid_moves_in_check(current_turn)
-            if (start, end) not in valid_moves:
-                if log:
-                    print(f"Invalid move: {current_turn} would be in check")
-                return False
-
-        if self.move_validator.is_valid_move(start, end):
-            captured_piece = self.get_piece(end)
-
-            if moving_piece.type == 'pawn' and abs(start[0] - end[0]) == 2:
-                self.last_double_pawn_move = (end[0], end[1])
-            else:
-                self.last_double_pawn_move = None
-            
-            # Perform the move  
-            self.board[end[0]][end[1]] = moving_piece
-            self.board[start[0]][start[1]] = None
-            moving_piece.has_moved = True
-
-            if moving_piece.type == 'pawn' and (end[0] == 0 or end[0] == 7):
-                self.board[end[0]][end[1]] = ChessPiece(moving_piece.color, 'queen')
-
-            # Check if the move puts the current player in check
-            if self.game_rules.is_in_check(current_turn):
-                # Undo the move
-                self.board[start[0]][start[1]] = moving_piece
-                self.board[end[0]][end[1]] = captured_piece
-                if log:
-                    print(f"Invalid move: {current_turn} would be in check")
-                return False
-            
+        move = from_tuple((start, end, promotion), self.move_generator.legal_moves(current_turn))
+        if move is None:
             if log:
-                # Handle capture
-                if captured_piece:
-                    print(f"Captured: {captured_piece.color} {captured_piece.type}")
-                    self.game_state.add_capture(captured_piece)
+                if from_tuple((start, end, promotion), self.move_generator.generate_moves(current_turn)) is not None:
+                    print(f"Invalid move: {current_turn} would be in check")
+                else:
+                    print(f"Invalid move: {start} to {end}")
+            return False
 
-                print(f"Move successful: {moving_piece.color} {moving_piece.type} moved from {start} to {end}")
+        self.apply_move(move, log)
 
-            self.move_history.append((start, end))
-            
-            # Switch turns
-            self.game_state.switch_turn()
+        return True
 
-            return True
-        else:
+    def apply_move(self, move, log=False):
+        # Play a legal 16-bit move as a game move, keeping captures and move_history as well
+        moving_piece = PIECES[self.squares[move & 63]]
+        self.make_move(move)
+        start, end = to_tuple(move)[:2]
+
+        captured = self._undo_captured[self.ply - 1]
+        if captured is not None:
+            captured_piece = PIECES[captured]
+            self.game_state.add_capture(captured_piece)
             if log:
-                print(f"Invalid move: {start} to {end}")
-            return False
+                print(f"Captured: {captured_piece.color} {captured_piece.type}")
+
+        if log:
+            print(f"Move successful: {moving_piece.color} {moving_piece.type} moved from {start} to {end}")
+
+        self.move_history.append((start, end))
+        self.last_move = move
+
+    def undo_move(self):
+        # Take back the last apply_move() (or move_piece()) and return it; None when there is none
+        if not self.ply:
+            return None
+        move = self._undo_moves[self.ply - 1]
+        captured = self._undo_captured[self.ply - 1]
+        self.unmake_move()
+
+        if captured is not None:
+            # add_capture() files a piece under the side that took it
+            captures = self.game_state.black_captures if captured < 6 else self.game_state.white_captures
+            captures.pop()
+        self.move_history.pop()
+        self.last_move = self._undo_moves[self.ply - 1] if self.ply else None
+        return move
+
+    def make_move(self, move):
+        """
+        Play a 16-bit move (see board/move.py) from the generator, with no
+        legality check. Everything needed to take it back goes on the undo
+        stack, so unmake_move() needs no argument.
+        """
+        ply = self.ply
+        if ply == len(self._undo_moves):
+            self._grow_undo_stack()
+
+        start_sq = move & 63
+        end_sq = (move >> 6) & 63
+        flag = move >> 12
+        moved = self.squares[start_sq]
+
+        self._undo_moves[ply] = move
+        self._undo_castling[ply] = self.castling_rights
+        self._undo_last_double[ply] = self.last_double_pawn_move
+        self._undo_hash[ply] = self.hash
+        self._undo_halfmove[ply] = self.halfmove_clock
+        old_en_passant_key = en_passant_key(self)
+
+        if flag == EN_PASSANT:
+            # The captured pawn sits beside the capturing one, not on the target square
+            captured = self._remove_piece((start_sq & ~7) | (end_sq & 7))
+        else:
+            captured = self._remove_piece(end_sq)
+        self._undo_captured[ply] = captured
+
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            # The move generator has already checked rights, the path and attacked squares
+            row = start_sq & ~7
+            rook_start, rook_end = (row + 7, row + 5) if flag == KING_CASTLE else (row, row + 3)
+            self._place_piece(rook_end, self._remove_piece(rook_start))
+
+        self._remove_piece(start_sq)
+        if flag & PROMOTION:
+            # Knight, bishop, rook and queen follow the pawn in code order
+            self._place_piece(end_sq, moved + KNIGHT + (flag & 3))
+        else:
+            self._place_piece(end_sq, moved)
 
-    def _handle_castling(self, start, end):
-        king = self.get_piece(start)
-        if king.has_moved:
-            return False
+        if captured is not None or moved == 0 or moved == 6:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
 
-        # Determine rook position and new positions
-        row = start[0]
-        if end[1] > start[1]:  # Kingside castling
-            rook_start = (row, 7)
-            rook_end = (row, 5)
-            path_cols = range(5, 7)
-        else:  # Queenside castling
-            rook_start = (row, 0)
-            rook_end = (row, 3)
-            path_cols = range(1, 4)
-
-        rook = self.get_piece(rook_start)
-        if not rook or rook.type != 'rook' or rook.has_moved:
-            return False
+        if flag == DOUBLE_PAWN_PUSH:
+            self.last_double_pawn_move = (end_sq >> 3, end_sq & 7)
+        else:
+            self.last_double_pawn_move = None
 
-        # Check path is clear
-        for col in path_cols:
-            if self.get_piece((row, col)) is not None:
-                return False
-
-        # Check if king passes through check
-        king_color = king.color
-        for col in [start[1], *path_cols]:
-            if self.is_square_attacked((row, col), king_color):
-                return False
-
-        # Perform castling
-        self.board[rook_end[0]][rook_end[1]] = rook
-        self.board[rook_start[0]][rook_start[1]] = None
-        rook.has_moved = True
-        return True
-    
-    def _handle_en_passant(self, start, end):
-        pawn = self.get_piece(start)
-        if not self.last_double_pawn_move:
-            return False
+        self.ply = ply + 1
+        self._finish_move(start_sq, end_sq, old_en_passant_key)
+
+    def unmake_move(self):
+        # Take back the last make_move()
+        self.ply -= 1
+        ply = self.ply
+        move = self._undo_moves[ply]
+        start_sq = move & 63
+        end_sq = (move >> 6) & 63
+        flag = move >> 12
+        captured = self._undo_captured[ply]
+
+        moved = self._remove_piece(end_sq)
+        if flag & PROMOTION:
+            moved -= KNIGHT + (flag & 3)
+        self._place_piece(start_sq, moved)
+        if flag == EN_PASSANT:
+            self._place_piece((start_sq & ~7) | (end_sq & 7), captured)
+        elif captured is not None:
+            self._place_piece(end_sq, captured)
+
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            row = start_sq & ~7
+            rook_start, rook_end = (row + 7, row + 5) if flag == KING_CASTLE else (row, row + 3)
+            self._place_piece(rook_start, self._remove_piece(rook_end))
+
+        self.castling_rights = self._undo_castling[ply]
+        self.last_double_pawn_move = self._undo_last_double[ply]
+        self.hash = self._undo_hash[ply]
+        self.halfmove_clock = self._undo_halfmove[ply]
+
+        game_state = self.game_state
+        game_state.current_turn = 'black' if game_state.current_turn == 'white' else 'white'
+        game_state.move_count -= 1
+
+    def make_null_move(self):
+        # Pass the turn without moving, for null-move pruning; taken back by unmake_null_move()
+        ply = self.ply
+        if ply == len(self._undo_moves):
+            self._grow_undo_stack()
+        self._undo_moves[ply] = NULL_MOVE
+        self._undo_captured[ply] = None
+        self._undo_castling[ply] = self.castling_rights
+        self._undo_last_double[ply] = self.last_double_pawn_move
+        self._undo_hash[ply] = self.hash
+        self._undo_halfmove[ply] = self.halfmove_clock
+
+        self.hash ^= en_passant_key(self) ^ SIDE_KEY
+        self.last_double_pawn_move = None
+        self.halfmove_clock += 1
+        self.ply = ply + 1
+        self.game_state.switch_turn()
 
-        # Check if this is a valid en passant capture
-        last_row, last_col = self.last_double_pawn_move
-        if last_row == start[0] and abs(last_col - start[1]) == 1:
-            # Remove the captured pawn
-            self.board[last_row][last_col] = None
-            return True
+    def unmake_null_move(self):
+        self.ply -= 1
+        ply = self.ply
+        self.last_double_pawn_move = self._undo_last_double[ply]
+        self.hash = self._undo_hash[ply]
+        self.halfmove_clock = self._undo_halfmove[ply]
+
+        game_state = self.game_state
+        game_state.current_turn = 'black' if game_state.current_turn == 'white' else 'white'
+        game_state.move_count -= 1
+
+    def previous_move(self):
+        # The move make_move() played last, or 0 at the bottom of the undo stack
+        return self._undo_moves[self.ply - 1] if self.ply else 0
+
+    def _reset_undo_stack(self):
+        # Parallel preallocated arrays, one slot per ply, so making a move allocates nothing
+        self.ply = 0
+        self._undo_moves = [0] * UNDO_STACK_SIZE
+        self._undo_captured = [None] * UNDO_STACK_SIZE
+        self._undo_castling = [0] * UNDO_STACK_SIZE
+        self._undo_last_double = [None] * UNDO_STACK_SIZE
+        self._undo_hash = [0] * UNDO_STACK_SIZE
+        self._undo_halfmove = [0] * UNDO_STACK_SIZE
+
+    def _grow_undo_stack(self):
+        # Long games outgrow the first allocation; double every array
+        size = len(self._undo_moves)
+        for stack in (self._undo_moves, self._undo_captured, self._undo_castling,
+                      self._undo_last_double, self._undo_hash, self._undo_halfmove):
+            stack.extend(stack[:1] * size)
+
+    def legal_moves(self, color=None):
+        # Legal moves as ((row, col), (row, col)[, promotion]) tuples
+        if color is None:
+            color = self.game_state.get_current_turn()
+        return [to_tuple(move) for move in self.move_generator.legal_moves(color)]
 
-        return False
-    
     def get_piece(self, position):
-        row, col = position
-        piece = self.board[row][col]
-        return piece
+        # A shared read-only ChessPiece view of the code on that square
+        code = self.squares[position[0] * 8 + position[1]]
+        return PIECES[code] if code is not None else None
     
     def is_square_attacked(self, square, defending_color):
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece((row, col))
-                if piece and piece.color != defending_color:
-                    if self.move_validator.is_valid_move((row, col), square):
-                        return True
-        return False
-    
-    def copy(self):
-        new_board = ChessBoard()
+        them = 1 - COLOR_INDEX[defending_color]
+        return self.attackers_to(square[0] * 8 + square[1], them) != 0
 
-        new_board.board = [
-            [
-                self.board[row][col].copy() if self.board[row][col] else None
-                for col in range(8)
-            ]
-            for row in range(8)
-        ]
+    def get_attackers(self, square, attacking_color):
+        attackers = self.attackers_to(square[0] * 8 + square[1], COLOR_INDEX[attacking_color])
+        return [divmod(sq, 8) for sq in iter_bits(attackers)]
 
-        new_board.game_state = copy.deepcopy(self.game_state)
-        
-        from src.board.move_validator import MoveValidator
-        from src.board.game_rules import GameRules
+    def attackers_to(self, sq, them, occupied=None):
+        """
+        Bitboard of pieces of color index 'them' attacking square 'sq'.
+
+        Works outward from the target: a knight, king or pawn pattern placed on
+        'sq' hits exactly the squares those pieces would attack it from, and
+        slider rays from 'sq' stop at the first blocker.
+        """
+        if occupied is None:
+            occupied = self.occupied
+        bitboards = self.bitboards
+        base = them * 6
+        attackers = ((KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT])
+                     | (KING_ATTACKS[sq] & bitboards[base + KING])
+                     | (PAWN_ATTACKS[1 - them][sq] & bitboards[base + PAWN]))
+        rooks = (bitboards[base + ROOK] | bitboards[base + QUEEN]) & ORTHOGONAL_LINES[sq]
+        if rooks:
+            attackers |= rook_attacks(sq, occupied) & rooks
+        bishops = (bitboards[base + BISHOP] | bitboards[base + QUEEN]) & DIAGONAL_LINES[sq]
+        if bishops:
+            attackers |= bishop_attacks(sq, occupied) & bishops
+        return attackers
+    
+    def copy(self):
+        # Everything is flat lists of ints, so a shallow slice of each is a full copy
+        new_board = ChessBoard.__new__(ChessBoard)
+        new_board.squares = self.squares[:]
+        new_board.bitboards = self.bitboards[:]
+        new_board.occupancy = self.occupancy[:]
+        new_board.occupied = self.occupied
+        new_board.king_squares = self.king_squares[:]
+        new_board.castling_rights = self.castling_rights
+        new_board.hash = self.hash
+        new_board.pawn_hash = self.pawn_hash
+        new_board.material = self.material[:]
+        new_board.pst = self.pst[:]
+
+        new_board.game_state = copy.copy(self.game_state)
+        new_board.game_state.white_captures = self.game_state.white_captures[:]
+        new_board.game_state.black_captures = self.game_state.black_captures[:]
         new_board.move_validator = MoveValidator(new_board)
+        new_board.move_generator = MoveGenerator(new_board)
         new_board.game_rules = GameRules(new_board)
 
-        new_board.move_history = copy.deepcopy(self.move_history)
-        new_board.last_move = copy.deepcopy(self.last_move)
-        new_board.last_double_pawn_move = copy.deepcopy(self.last_double_pawn_move)
+        new_board.move_history = self.move_history[:]
+        new_board.last_move = self.last_move
+        new_board.last_double_pawn_move = self.last_double_pawn_move
+        new_board.initial_fen = self.initial_fen
+        new_board.halfmove_clock = self.halfmove_clock
+        # The copy starts its own undo history
+        new_board._reset_undo_stack()
 
         return new_board
     
-    def push_move_in_place(self, start, end):
-
-        # Gather info
-        moved_piece = self.board[start[0]][start[1]]
-        captured_piece = self.board[end[0]][end[1]]
-
-        move_info = {
-            'start': start,
-            'end': end,
-            'moved_piece': moved_piece,
-            'captured_piece': captured_piece,
-            'old_has_moved': moved_piece.has_moved,
-
-            'old_turn': self.game_state.get_current_turn(),
-
-            'old_move_count': self.game_state.get_move_count(),
-
-            'old_last_double': self.last_double_pawn_move,
-        }
-
-
-        # Perform the move
-        self.board[end[0]][end[1]] = moved_piece
-        self.board[start[0]][start[1]] = None
-        moved_piece.has_moved = True
-
-        if moved_piece.type == 'pawn' and abs(start[0] - end[0]) == 2:
-            self.last_double_pawn_move = (end[0], end[1])
-        else:
-            self.last_double_pawn_move = None
-
-        # Handle pawn promotion if needed
-        if moved_piece.type == 'pawn' and (end[0] == 0 or end[0] == 7):
-            # We'll store the old type so we can undo it
-            move_info['old_type'] = moved_piece.type
-            moved_piece.type = 'queen'
-
-        self.game_state.switch_turn()
-
-        return move_info
+    def push_move_in_place(self, start, end, promotion='queen'):
+        # Tuple front end to make_move(); returns the 16-bit move that was played
+        move = from_tuple((start, end, promotion), self.move_generator.generate_moves(self.game_state.current_turn))
+        if move is None:
+            raise ValueError(f"illegal move {start} to {end}")
+        self.make_move(move)
+        return move
     
-    def pop_move_in_place(self, move_info):
+    def pop_move_in_place(self, move):
         """
-        Reverse the move stored in 'move_info'.
+        Reverse the move played by push_move_in_place().
         """
-        self.board[move_info['start'][0]][move_info['start'][1]] = move_info['moved_piece']
-        self.board[move_info['end'][0]][move_info['end'][1]] = move_info['captured_piece']
-
-        # Undo the move
-        move_info['moved_piece'].has_moved = move_info['old_has_moved']
-
-        if 'old_type' in move_info:
-            move_info['moved_piece'].type = move_info['old_type']
-
-        # Restore has_moved
-        self.last_double_pawn_move = move_info['old_last_double']
-
-        # Undo promotion if it happened
-        self.game_state.current_turn = move_info['old_turn']
-        self.game_state.move_count = move_info['old_move_count']
\ No newline at end of file
+        self.unmake_move()
+
+    def perft(self, depth):
+        # Count the leaf nodes of the legal move tree; the standard move generator check
+        if depth == 0:
+            return 1
+        moves = self.move_generator.legal_moves(self.game_state.current_turn)
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.make_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+    def divide(self, depth):
+        # Perft split by root move, for tracking down which move a wrong count comes from
+        counts = {}
+        for move in self.move_generator.legal_moves(self.game_state.current_turn):
+            self.make_move(move)
+            counts[to_tuple(move)] = self.perft(depth - 1)
+            self.unmake_move()
+        return counts
@@ -0,0 +1,76 @@
+# board/move.py
+#
+# Moves as 16-bit ints: from square in bits 0-5, to square in bits 6-11 and a
+# 4-bit flag in bits 12-15 saying what kind of move it is. Squares use the
+# row * 8 + col numbering from bitboard.py.
+#
+#   flag  0  quiet            4  capture
+#         1  double pawn push 5  en passant capture
+#         2  kingside castle  8-11   promotion to knight, bishop, rook, queen
+#         3  queenside castle 12-15  capturing promotion
+
+from src.board.bitboard import POSITIONS
+
+QUIET, DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE = 0, 1, 2, 3
+CAPTURE, EN_PASSANT = 4, 5
+PROMOTION = 8  # Low two bits pick the piece, the capture bit may be set as well
+
+# Flags shifted into place, for building moves without another shift
+CAPTURE_BIT = CAPTURE << 12
+PROMOTION_BIT = PROMOTION << 12
+
+PROMOTION_PIECES = ('knight', 'bishop', 'rook', 'queen')
+PROMOTION_INDEX = {piece_type: index for index, piece_type in enumerate(PROMOTION_PIECES)}
+
+NULL_MOVE = 0
+
+
+def make(start, end, flags=QUIET):
+    return start | (end << 6) | (flags << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_flags(move):
+    return move >> 12
+
+
+def is_capture(move):
+    return bool(move & CAPTURE_BIT)
+
+
+def is_promotion(move):
+    return bool(move & PROMOTION_BIT)
+
+
+def promotion_type(move):
+    # Name of the piece a promotion creates, None for any other move
+    if move & PROMOTION_BIT:
+        return PROMOTION_PIECES[(move >> 12) & 3]
+    return None
+
+
+def to_tuple(move):
+    # 16-bit move -> the ((row, col), (row, col)[, promotion]) form the GUI and older APIs use
+    start, end = POSITIONS[move & 63], POSITIONS[(move >> 6) & 63]
+    if move & PROMOTION_BIT:
+        return (start, end, PROMOTION_PIECES[(move >> 12) & 3])
+    return (start, end)
+
+
+def from_tuple(move, legal_moves):
+    # Find the 16-bit move among legal_moves matching a tuple move; promotions default to a queen
+    start = move[0][0] * 8 + move[0][1]
+    end = move[1][0] * 8 + move[1][1]
+    promotion = move[2] if len(move) > 2 else 'queen'
+    for candidate in legal_moves:
+        if candidate & 63 == start and (candidate >> 6) & 63 == end:
+            if not candidate & PROMOTION_BIT or PROMOTION_PIECES[(candidate >> 12) & 3] == promotion:
+                return candidate
+    return None
@@ -0,0 +1,286 @@
+# board/move_generator.py
+
+from src.board.bitboard import (
+    WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, COLOR_INDEX, FULL_BOARD, FILE_MASKS, RANK_MASKS,
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, ORTHOGONAL_LINES, DIAGONAL_LINES, BETWEEN,
+    rook_attacks, bishop_attacks, iter_bits, lsb
+)
+from src.board.move import (
+    DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EN_PASSANT, PROMOTION, CAPTURE_BIT
+)
+
+NOT_A_FILE = FULL_BOARD & ~FILE_MASKS[0]
+NOT_H_FILE = FULL_BOARD & ~FILE_MASKS[7]
+
+# Flag bits already shifted into place (see board/move.py); promotions best first
+DOUBLE_PAWN_FLAG = DOUBLE_PAWN_PUSH << 12
+EN_PASSANT_FLAG = EN_PASSANT << 12
+PROMOTION_FLAGS = tuple((PROMOTION | piece) << 12 for piece in (3, 2, 1, 0))
+CAPTURE_PROMOTION_FLAGS = tuple((PROMOTION | CAPTURE | piece) << 12 for piece in (3, 2, 1, 0))
+QUEEN_PROMOTION = PROMOTION | 3
+
+
+class MoveGenerator:
+    """
+    Move generation straight from the bitboards.
+
+    Moves are 16-bit ints (see board/move.py). Every generator appends to the
+    list it is given, so a search can reuse one list per ply; without one a new
+    list is returned.
+    """
+
+    def __init__(self, board):
+        self.board = board
+
+    def generate_moves(self, color, captures_only=False, moves=None, quiets_only=False):
+        """Pseudo-legal moves: these may still leave the mover's own king in check."""
+        board = self.board
+        us = COLOR_INDEX[color]
+        # With no enemy squares to land on, only quiet moves are left
+        enemy = 0 if quiets_only else board.occupancy[1 - us]
+        occupied = board.occupied
+        quiet = 0 if captures_only else FULL_BOARD & ~occupied
+        pieces = board.bitboards[us * 6:us * 6 + 6]
+
+        if moves is None:
+            moves = []
+        self._add_pawn_moves(moves, us, pieces[PAWN], enemy, occupied, captures_only, FULL_BOARD)
+
+        for sq in iter_bits(pieces[KNIGHT]):
+            self._add_piece_moves(moves, sq, KNIGHT_ATTACKS[sq], enemy, quiet)
+        for sq in iter_bits(pieces[BISHOP] | pieces[QUEEN]):
+            self._add_piece_moves(moves, sq, bishop_attacks(sq, occupied), enemy, quiet)
+        for sq in iter_bits(pieces[ROOK] | pieces[QUEEN]):
+            self._add_piece_moves(moves, sq, rook_attacks(sq, occupied), enemy, quiet)
+
+        for sq in iter_bits(pieces[KING]):
+            self._add_piece_moves(moves, sq, KING_ATTACKS[sq], enemy, quiet)
+            if not captures_only:
+                self._add_castling_moves(moves, color, sq)
+
+        return moves
+
+    def legal_moves(self, color, captures_only=False, moves=None, quiets_only=False):
+        """
+        Strictly legal moves, found without playing any of them.
+
+        Pinned pieces stay on the line between their king and the pinner, and
+        while in check every other move has to capture the checker or block it.
+        captures_only and quiets_only split the list in two (quiet promotions
+        count as quiet) for searches that want captures first.
+        """
+        board = self.board
+        us = COLOR_INDEX[color]
+        them = 1 - us
+        enemy = 0 if quiets_only else board.occupancy[them]
+        occupied = board.occupied
+        quiet = 0 if captures_only else FULL_BOARD & ~occupied
+        pieces = board.bitboards[us * 6:us * 6 + 6]
+        king_sq = board.king_squares[us]
+
+        if moves is None:
+            moves = []
+
+        # The king is lifted off the board first so it cannot shelter behind itself from a slider
+        without_king = occupied ^ (1 << king_sq)
+        for to in iter_bits(KING_ATTACKS[king_sq] & enemy):
+            if not board.attackers_to(to, them, without_king):
+                moves.append(king_sq | (to << 6) | CAPTURE_BIT)
+        for to in iter_bits(KING_ATTACKS[king_sq] & quiet):
+            if not board.attackers_to(to, them, without_king):
+                moves.append(king_sq | (to << 6))
+
+        checkers = board.attackers_to(king_sq, them)
+        if checkers & (checkers - 1):
+            return moves  # Double check: only the king can move
+
+        if checkers:
+            evasion = checkers | BETWEEN[king_sq][lsb(checkers)]
+        else:
+            evasion = FULL_BOARD
+            if not captures_only:
+                self._add_castling_moves(moves, color, king_sq)
+        enemy_targets = enemy & evasion
+        quiet_targets = quiet & evasion
+
+        pin_lines = self._pin_lines(us, king_sq, occupied)
+        pinned = 0
+        for sq in pin_lines:
+            pinned |= 1 << sq
+
+        self._add_pawn_moves(moves, us, pieces[PAWN] & ~pinned, enemy, occupied, captures_only, evasion, king_sq)
+        for sq in iter_bits(pieces[PAWN] & pinned):
+            self._add_pawn_moves(moves, us, 1 << sq, enemy, occupied, captures_only, evasion & pin_lines[sq], king_sq)
+
+        # A pinned knight can never stay on its pin line
+        for sq in iter_bits(pieces[KNIGHT] & ~pinned):
+            self._add_piece_moves(moves, sq, KNIGHT_ATTACKS[sq], enemy_targets, quiet_targets)
+
+        for sq in iter_bits(pieces[BISHOP] | pieces[QUEEN]):
+            attacks = bishop_attacks(sq, occupied)
+            if sq in pin_lines:
+                attacks &= pin_lines[sq]
+            self._add_piece_moves(moves, sq, attacks, enemy_targets, quiet_targets)
+
+        for sq in iter_bits(pieces[ROOK] | pieces[QUEEN]):
+            attacks = rook_attacks(sq, occupied)
+            if sq in pin_lines:
+                attacks &= pin_lines[sq]
+            self._add_piece_moves(moves, sq, attacks, enemy_targets, quiet_targets)
+
+        return moves
+
+    def tactical_moves(self, color, moves=None):
+        """
+        Legal captures and queen promotions, the moves quiescence search looks
+        at. Underpromotions are left out; a queen is as good or better there.
+        """
+        moves = self.legal_moves(color, captures_only=True, moves=moves)
+        us = COLOR_INDEX[color]
+        if self.board.bitboards[us * 6 + PAWN] & RANK_MASKS[1 if us == WHITE else 6]:
+            moves[:] = [move for move in moves if move >> 12 < PROMOTION or move >> 12 & 3 == 3]
+            moves.extend(move for move in self.legal_moves(color, quiets_only=True) if move >> 12 == QUEEN_PROMOTION)
+        return moves
+
+    def is_legal(self, move, color):
+        """
+        Whether a move from elsewhere (the transposition table, a killer slot) is
+        legal in this position, without generating the whole move list: only the
+        moving piece's moves are generated, then the move is tried on the board.
+        """
+        board = self.board
+        us = COLOR_INDEX[color]
+        start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+        piece = board.squares[start]
+        if piece is None or piece // 6 != us:
+            return False
+
+        piece_type = piece % 6
+        occupied = board.occupied
+        enemy = board.occupancy[1 - us]
+        quiet = FULL_BOARD & ~occupied
+        candidates = []
+        if piece_type == PAWN:
+            self._add_pawn_moves(candidates, us, 1 << start, enemy, occupied, False, FULL_BOARD)
+        elif piece_type == KING and (flag == KING_CASTLE or flag == QUEEN_CASTLE):
+            # Castling moves are only generated when they are fully legal
+            self._add_castling_moves(candidates, color, start)
+            return move in candidates
+        else:
+            if piece_type == KNIGHT:
+                attacks = KNIGHT_ATTACKS[start]
+            elif piece_type == BISHOP:
+                attacks = bishop_attacks(start, occupied)
+            elif piece_type == ROOK:
+                attacks = rook_attacks(start, occupied)
+            elif piece_type == QUEEN:
+                attacks = bishop_attacks(start, occupied) | rook_attacks(start, occupied)
+            else:
+                attacks = KING_ATTACKS[start]
+            self._add_piece_moves(candidates, start, attacks & (1 << end), enemy, quiet)
+        if move not in candidates:
+            return False
+
+        board.make_move(move)
+        legal = not board.attackers_to(board.king_squares[us], 1 - us)
+        board.unmake_move()
+        return legal
+
+    def _pin_lines(self, us, king_sq, occupied):
+        # {pinned square: squares it may still move to, i.e. up to and including the pinner}
+        bitboards = self.board.bitboards
+        base = (1 - us) * 6
+        snipers = ((ORTHOGONAL_LINES[king_sq] & (bitboards[base + ROOK] | bitboards[base + QUEEN]))
+                   | (DIAGONAL_LINES[king_sq] & (bitboards[base + BISHOP] | bitboards[base + QUEEN])))
+        own = self.board.occupancy[us]
+        pin_lines = {}
+        for sniper in iter_bits(snipers):
+            blockers = BETWEEN[king_sq][sniper] & occupied
+            if blockers & own and not blockers & (blockers - 1):
+                pin_lines[lsb(blockers)] = BETWEEN[king_sq][sniper] | (1 << sniper)
+        return pin_lines
+
+    def _add_piece_moves(self, moves, sq, attacks, enemy, quiet):
+        for to in iter_bits(attacks & enemy):
+            moves.append(sq | (to << 6) | CAPTURE_BIT)
+        for to in iter_bits(attacks & quiet):
+            moves.append(sq | (to << 6))
+
+    def _add_pawn_moves(self, moves, us, pawns, enemy, occupied, captures_only, allowed, king_sq=None):
+        if not pawns:
+            return
+        empty = FULL_BOARD & ~occupied
+
+        # Bit shifts move every pawn at once; the *_back offsets lead from a target back to its pawn
+        if us == WHITE:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_MASKS[5]) >> 8) & empty
+            left = ((pawns & NOT_A_FILE) >> 9) & enemy
+            right = ((pawns & NOT_H_FILE) >> 7) & enemy
+            push_back, left_back, right_back = 8, 9, 7
+            promotion_rank = RANK_MASKS[0]
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_MASKS[2]) << 8) & empty
+            left = ((pawns & NOT_A_FILE) << 7) & enemy
+            right = ((pawns & NOT_H_FILE) << 9) & enemy
+            push_back, left_back, right_back = -8, -7, -9
+            promotion_rank = RANK_MASKS[7]
+
+        for targets, back in ((left & allowed, left_back), (right & allowed, right_back)):
+            for to in iter_bits(targets & ~promotion_rank):
+                moves.append((to + back) | (to << 6) | CAPTURE_BIT)
+            for to in iter_bits(targets & promotion_rank):
+                move = (to + back) | (to << 6)
+                for flag in CAPTURE_PROMOTION_FLAGS:
+                    moves.append(move | flag)
+
+        if not captures_only:
+            pushes = single & allowed
+            for to in iter_bits(pushes & promotion_rank):
+                move = (to + push_back) | (to << 6)
+                for flag in PROMOTION_FLAGS:
+                    moves.append(move | flag)
+            for to in iter_bits(pushes & ~promotion_rank):
+                moves.append((to + push_back) | (to << 6))
+            for to in iter_bits(double & allowed):
+                moves.append((to + 2 * push_back) | (to << 6) | DOUBLE_PAWN_FLAG)
+
+        # En passant: the pawn that just made a double step can be taken in passing
+        # (not when enemy is empty, i.e. only quiet moves were asked for)
+        last_double = self.board.last_double_pawn_move
+        if last_double and enemy:
+            victim = last_double[0] * 8 + last_double[1]
+            if self.board.bitboards[(1 - us) * 6 + PAWN] & (1 << victim):
+                to = victim - push_back
+                for sq in iter_bits(PAWN_ATTACKS[1 - us][to] & pawns):
+                    if king_sq is None or self._en_passant_is_legal(us, king_sq, sq, to, victim):
+                        moves.append(sq | (to << 6) | EN_PASSANT_FLAG)
+
+    def _en_passant_is_legal(self, us, king_sq, start, end, victim):
+        # Both pawns leave the rank at once, which can uncover a slider on the king,
+        # so replay the occupancy; the captured pawn itself no longer gives check
+        occupied = (self.board.occupied ^ (1 << start) ^ (1 << victim)) | (1 << end)
+        return not self.board.attackers_to(king_sq, 1 - us, occupied) & ~(1 << victim)
+
+    def _add_castling_moves(self, moves, color, king_sq):
+        board = self.board
+        us = COLOR_INDEX[color]
+        row = king_sq & ~7
+        # This side's two castling rights bits: 1 = kingside, 2 = queenside
+        rights = board.castling_rights >> (2 * us)
+        if not rights & 3:
+            return
+
+        # (right, rook column, squares that must be empty, squares the king crosses, king target, flag)
+        for right, rook_col, empty_cols, king_cols, target_col, flag in (
+                (1, 7, (5, 6), (4, 5, 6), 6, KING_CASTLE), (2, 0, (1, 2, 3), (4, 3, 2), 2, QUEEN_CASTLE)):
+            if not rights & right:
+                continue
+            if board.squares[row + rook_col] != us * 6 + ROOK:
+                continue
+            if any(board.squares[row + c] is not None for c in empty_cols):
+                continue
+            if any(board.attackers_to(row + c, 1 - us) for c in king_cols):
+                continue
+            moves.append(king_sq | ((row + target_col) << 6) | (flag << 12))
@@ -0,0 +1,102 @@
+# board/move_log.py
+#
+# Undo/redo for a game kept as a list of 16-bit moves rather than a snapshot
+# of the board after every move.
+
+from src.board.move import to_tuple
+
+# Plies between the positions saved for jumping around a long game
+CHECKPOINT_INTERVAL = 32
+
+
+class MoveLog:
+    """
+    The moves played on one ChessBoard, with a cursor for undo and redo.
+
+    Undo takes a move back through the board's own undo stack and redo plays
+    it again, so each step is O(1) and the log grows by one int per move.
+    Every checkpoint_interval plies the position is saved as FEN; goto() and
+    an undo past the start of the board's undo stack replay from the nearest
+    one instead of from the first move.
+    """
+
+    def __init__(self, board, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.board = board
+        self.checkpoint_interval = checkpoint_interval
+        self.moves = []
+        # moves[:current] are on the board, moves[current:] can be redone
+        self.current = 0
+        # The first log position the board can still reach with undo_move()
+        self.stack_floor = 0
+        self.initial_fen = board.initial_fen
+        self.history_base = board.move_history[:]
+        self.checkpoints = {}
+        self._save_checkpoint()
+
+    def push(self, start, end, promotion='queen', log=True):
+        # Play a move through board.move_piece(); any moves that were undone are dropped
+        if not self.board.move_piece(start, end, log=log, promotion=promotion):
+            return False
+        del self.moves[self.current:]
+        for index in [index for index in self.checkpoints if index > self.current]:
+            del self.checkpoints[index]
+
+        self.moves.append(self.board.last_move)
+        self.current += 1
+        if self.current % self.checkpoint_interval == 0:
+            self._save_checkpoint()
+        return True
+
+    def can_undo(self):
+        return self.current > 0
+
+    def can_redo(self):
+        return self.current < len(self.moves)
+
+    def undo(self):
+        if not self.can_undo():
+            return False
+        if self.current > self.stack_floor:
+            self.board.undo_move()
+            self.current -= 1
+        else:
+            self._restore(self.current - 1)
+        return True
+
+    def redo(self):
+        if not self.can_redo():
+            return False
+        self.board.apply_move(self.moves[self.current])
+        self.current += 1
+        return True
+
+    def goto(self, index):
+        # Move the cursor to any ply, walking or replaying from a checkpoint, whichever is shorter
+        index = max(0, min(index, len(self.moves)))
+        checkpoint = max(ply for ply in self.checkpoints if ply <= index)
+        reachable = index >= self.current or index >= self.stack_floor
+        if not reachable or index - checkpoint < abs(self.current - index):
+            self._restore(index)
+        while self.current > index:
+            self.undo()
+        while self.current < index:
+            self.redo()
+
+    def _save_checkpoint(self):
+        game_state = self.board.game_state
+        self.checkpoints[self.current] = (self.board.get_fen(), game_state.white_captures[:],
+                                          game_state.black_captures[:])
+
+    def _restore(self, index):
+        # Set the board up from the last checkpoint at or before index, then replay up to it
+        checkpoint = max(ply for ply in self.checkpoints if ply <= index)
+        fen, white_captures, black_captures = self.checkpoints[checkpoint]
+        board = self.board
+        board.set_fen(fen)
+        board.initial_fen = self.initial_fen
+        board.move_history = self.history_base + [to_tuple(move)[:2] for move in self.moves[:checkpoint]]
+        board.game_state.white_captures = white_captures[:]
+        board.game_state.black_captures = black_captures[:]
+        self.stack_floor = self.current = checkpoint
+        while self.current < index:
+            self.redo()
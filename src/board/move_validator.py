@@ -1,5 +1,7 @@
 # board/move_validator.py
 
+from src.board.bitboard import BETWEEN, COLOR_INDEX
+
 class MoveValidator:
     def __init__(self, board):
         self.board = board
@@ -41,7 +43,8 @@ class MoveValidator:
         if start_col == end_col:
             if end_row == start_row + direction and self.board.get_piece(end) is None:
                 return True
-            if not piece.has_moved and end_row == start_row + 2 * direction:
+            # Only from the starting row
+            if start_row == (6 if piece.color == 'white' else 1) and end_row == start_row + 2 * direction:
                 intermediate = (start_row + direction, start_col)
                 if self.board.get_piece(end) is None and self.board.get_piece(intermediate) is None:
                     return True
@@ -59,22 +62,10 @@ class MoveValidator:
         return False
 
     def _is_valid_rook_move(self, start, end):
-        start_row, start_col = start
-        end_row, end_col = end
-        
-        if start_row == end_row:
-            step = 1 if end_col > start_col else -1
-            for col in range(start_col + step, end_col, step):
-                if self.board.get_piece((start_row, col)):
-                    return False
-            return True
-        elif start_col == end_col:
-            step = 1 if end_row > start_row else -1
-            for row in range(start_row + step, end_row, step):
-                if self.board.get_piece((row, start_col)):
-                    return False
-            return True
-        return False
+        if start[0] != end[0] and start[1] != end[1]:
+            return False
+        # Path must be clear: no occupied squares strictly between start and end
+        return not BETWEEN[start[0] * 8 + start[1]][end[0] * 8 + end[1]] & self.board.occupied
 
     def _is_valid_knight_move(self, start, end):
         start_row, start_col = start
@@ -84,19 +75,9 @@ class MoveValidator:
         return (row_diff == 2 and col_diff == 1) or (row_diff == 1 and col_diff == 2)
 
     def _is_valid_bishop_move(self, start, end):
-        start_row, start_col = start
-        end_row, end_col = end
-        if abs(end_row - start_row) == abs(end_col - start_col):
-            row_step = 1 if end_row > start_row else -1
-            col_step = 1 if end_col > start_col else -1
-            row, col = start_row + row_step, start_col + col_step
-            while (row, col) != (end_row, end_col):
-                if self.board.get_piece((row, col)):
-                    return False
-                row += row_step
-                col += col_step
-            return True
-        return False
+        if abs(end[0] - start[0]) != abs(end[1] - start[1]):
+            return False
+        return not BETWEEN[start[0] * 8 + start[1]][end[0] * 8 + end[1]] & self.board.occupied
 
     def _is_valid_queen_move(self, start, end):
         return self._is_valid_rook_move(start, end) or self._is_valid_bishop_move(start, end)
@@ -110,7 +91,9 @@ class MoveValidator:
         if max(row_diff, col_diff) == 1:
             return True
             
-        if not self.board.get_piece(start).has_moved and row_diff == 0 and abs(col_diff) == 2:
-            return True
+        # Castling needs the side's right for that wing: kingside is the low bit, queenside the next
+        rights = self.board.castling_rights >> (2 * COLOR_INDEX[self.board.get_piece(start).color])
+        if row_diff == 0 and col_diff == 2:
+            return bool(rights & (1 if end_col > start_col else 2))
             
         return False
\ No newline at end of file
@@ -0,0 +1,44 @@
+# board/zobrist.py
+
+import random
+
+from src.board.bitboard import PAWN, ADJACENT_FILE_MASKS, RANK_MASKS, COLOR_INDEX, iter_bits
+
+# Fixed seed so hashes are reproducible between runs and processes
+_random = random.Random(20240101)
+
+PIECE_KEYS = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+CASTLING_KEYS = [_random.getrandbits(64) for _ in range(16)]
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+SIDE_KEY = _random.getrandbits(64)
+
+
+def en_passant_key(board):
+    # Only hash the en passant file when the side to move can actually capture there,
+    # so transpositions that differ only by an unusable double step share a key
+    if not board.last_double_pawn_move:
+        return 0
+    row, col = board.last_double_pawn_move
+    us = COLOR_INDEX[board.game_state.get_current_turn()]
+    if board.bitboards[us * 6 + PAWN] & ADJACENT_FILE_MASKS[col] & RANK_MASKS[row]:
+        return EN_PASSANT_KEYS[col]
+    return 0
+
+
+def compute_hash(board):
+    key = 0
+    for index, bitboard in enumerate(board.bitboards):
+        for sq in iter_bits(bitboard):
+            key ^= PIECE_KEYS[index][sq]
+    key ^= CASTLING_KEYS[board.castling_rights]
+    if board.game_state.get_current_turn() == 'black':
+        key ^= SIDE_KEY
+    return key ^ en_passant_key(board)
+
+
+def compute_pawn_hash(board):
+    key = 0
+    for index in (PAWN, 6 + PAWN):
+        for sq in iter_bits(board.bitboards[index]):
+            key ^= PIECE_KEYS[index][sq]
+    return key
@@ -0,0 +1,142 @@
+# book.py
+#
+# Compiles a PGN game collection into a Polyglot opening book for ChessAI
+# (see engine/polyglot.py), and looks positions up in one:
+#
+#   python -m src.book build games.pgn more.pgn -o book.bin --plies 20 --min-games 3
+#   python -m src.book probe book.bin --fen "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+import argparse
+import re
+import sys
+from collections import defaultdict
+
+from src.board.chess_board import ChessBoard, STARTING_FEN
+from src.board.move import to_tuple
+from src.engine.polyglot import PolyglotBook, encode_move, polyglot_key, write_book
+from src.utils.helpers import move_to_san, san_to_move
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comments, NAGs, move numbers and results: everything in movetext that is not a move
+NOISE = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\d+\.(\.\.)?|1-0|0-1|1/2-1/2|\*')
+
+# Book points per game for the side that won, drew and lost
+RESULT_POINTS = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1)}
+
+
+def _strip_variations(text):
+    # Drop (...) variations, which may nest
+    depth = 0
+    kept = []
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(depth - 1, 0)
+        elif not depth:
+            kept.append(char)
+    return ''.join(kept)
+
+
+def read_pgn(stream):
+    """
+    Yield (tags, sans) for every game in a PGN stream: the tag pairs as a dict
+    and the main line's moves in SAN, without comments or variations.
+    """
+    tags, movetext = {}, []
+    for line in stream:
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if movetext:
+                yield tags, _movetext_sans(movetext)
+                tags, movetext = {}, []
+            match = TAG.match(stripped)
+            if match:
+                tags[match.group(1)] = match.group(2)
+        elif stripped and not stripped.startswith('%'):
+            movetext.append(line)
+    if tags or movetext:
+        yield tags, _movetext_sans(movetext)
+
+
+def _movetext_sans(lines):
+    text = NOISE.sub(' ', _strip_variations(''.join(lines)))
+    return text.split()
+
+
+def build_book(games, max_plies=20, min_games=1):
+    """
+    Count the moves of the first max_plies plies of every game into book
+    weights (see engine/polyglot.write_book): two points for a move by the
+    side that went on to win, one for a draw. Moves played in fewer than
+    min_games games are left out. Returns (weights, games read).
+    """
+    # key => encoded move => [games, points]
+    counts = defaultdict(dict)
+    total = 0
+    for tags, sans in games:
+        total += 1
+        board = ChessBoard()
+        board.set_fen(tags.get('FEN', STARTING_FEN))
+        points = RESULT_POINTS.get(tags.get('Result'), (1, 1))
+        for san in sans[:max_plies]:
+            move = san_to_move(board, san)
+            if move is None:
+                # A move this board cannot make ends the game's usable part
+                break
+            white_to_move = board.game_state.get_current_turn() == 'white'
+            key = polyglot_key(board)
+            played = board.push_move_in_place(*move)
+            entry = counts[key].setdefault(encode_move(played), [0, 0])
+            entry[0] += 1
+            entry[1] += points[0] if white_to_move else points[1]
+
+    weights = {}
+    for key, moves in counts.items():
+        kept = {move: points for move, (games, points) in moves.items() if games >= min_games}
+        if kept:
+            weights[key] = kept
+    return weights, total
+
+
+def _read_files(paths):
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as stream:
+            yield from read_pgn(stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect a Polyglot opening book")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="compile PGN files into a .bin book")
+    build.add_argument('pgn', nargs='+', help="PGN game collections")
+    build.add_argument('-o', '--output', required=True, help="book file to write")
+    build.add_argument('--plies', type=int, default=20, help="plies of each game to include")
+    build.add_argument('--min-games', type=int, default=1, help="games a move must appear in to be kept")
+
+    probe = commands.add_parser('probe', help="list the book moves for a position")
+    probe.add_argument('book', help="Polyglot .bin book")
+    probe.add_argument('--fen', default=STARTING_FEN, help="position to look up (default: the initial position)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        weights, games = build_book(_read_files(args.pgn), args.plies, args.min_games)
+        write_book(args.output, weights)
+        entries = sum(len(moves) for moves in weights.values())
+        print(f"{games} games, {len(weights)} positions, {entries} entries written to {args.output}")
+    else:
+        board = ChessBoard()
+        board.set_fen(args.fen)
+        with PolyglotBook(args.book) as book:
+            entries = book.entries(board)
+        total = sum(weight for _, weight in entries) or 1
+        for move, weight in sorted(entries, key=lambda entry: entry[1], reverse=True):
+            print(f"{move_to_san(board, to_tuple(move)):<8} {weight:>6} {weight / total:6.1%}")
+        if not entries:
+            print("not in book")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
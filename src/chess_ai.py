@@ -1,91 +1,97 @@
-from src.board.chess_board import ChessBoard
+from src.board.chess_board import ChessBoard, STARTING_FEN
+from src.board.move import CAPTURE_BIT, PROMOTION_BIT, KING_CASTLE, QUEEN_CASTLE, PROMOTION, to_tuple
+from src.board.piece_square import PIECE_VALUES, POSITION_VALUES
+from src.board.bitboard import (
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, COLORS, PIECE_INDEX, COLOR_INDEX,
+    FILE_MASKS, ADJACENT_FILE_MASKS, PASSED_PAWN_MASKS, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+    ORTHOGONAL_LINES, DIAGONAL_LINES, iter_bits, popcount
+)
+from src.engine.transposition import (
+    TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, MATE_VALUE, MATE_BOUND, value_to_tt, value_from_tt
+)
+from src.engine.bitbase import Bitbases, DEFAULT_DIRECTORY as DEFAULT_BITBASE_DIRECTORY
+from src.engine.pawn_table import PawnHashTable
+from src.engine.polyglot import PolyglotBook
+from src.engine.move_picker import MovePicker, capture_score, order_moves
+from src.engine.see import see, SEE_VALUES
+from src.engine.smp import parallel_search
+from src.engine.time_manager import TimeManager
 import copy
-import random
-import time
+import math
 
-MATE_VALUE = 100000
+# Move lists are kept per ply and reused; deeper searches add more as they go
+MAX_PLY = 128
+
+# Iterative deepening goes on until the time manager stops it, or this deep
+MAX_DEPTH = 64
+
+# The clock and other limits are checked once every this many nodes (a power of two)
+CHECK_INTERVAL = 256
+
+# Half-width of the first aspiration window around the last iteration's score; it
+# grows by ASPIRATION_GROWTH on every fail and opens fully past ASPIRATION_LIMIT
+ASPIRATION_WINDOW = 50
+ASPIRATION_GROWTH = 4
+ASPIRATION_LIMIT = 1000
+
+# Null-move pruning: passing the turn and still failing high at depth - 1 - R
+# (R grows by one from NULL_MOVE_DEEP_DEPTH) proves the node is above beta
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP_DEPTH = 7
+
+# Late move reductions: quiet moves after the first LMR_FULL_DEPTH_MOVES are searched
+# LMR_REDUCTIONS[depth][index] plies shallower, and again in full only if they fail high
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+LMR_REDUCTIONS = [[0] + [int(0.75 + math.log(depth) * math.log(index) / 2.25) if depth else 0
+                         for index in range(1, 64)] for depth in range(MAX_DEPTH + 1)]
+
+# Futility pruning: at these remaining depths, quiet moves are skipped when the static
+# evaluation plus the margin still cannot reach alpha
+FUTILITY_MARGINS = [0, 200, 400]
+
+# Delta pruning in quiescence: a capture is skipped when the victim's value plus this
+# margin (for positional gains) would still leave the stand-pat score below alpha
+DELTA_MARGIN = 200
+
+# Score for a bitbase win without a known distance to mate: above any evaluation, below every mate
+BITBASE_WIN = 20000
 
 class ChessAI:
-    def __init__(self, color):
+    def __init__(self, color, hash_size_mb=16, threads=1, shared_hash=None, verbose=True, info_callback=None,
+                 book_path=None, bitbase_dir=DEFAULT_BITBASE_DIRECTORY):
         self.color = color
-        self.piece_values = {
-            'pawn': 100, 'knight': 320, 'bishop': 330,
-            'rook': 500, 'queen': 900, 'king': 20000
-        }
-        self.position_values = {
-            'pawn': [
-                [0,  0,  0,  0,  0,  0,  0,  0],
-                [50, 50, 50, 50, 50, 50, 50, 50],
-                [10, 10, 20, 30, 30, 20, 10, 10],
-                [5,  5, 10, 25, 25, 10,  5,  5],
-                [0,  0,  0, 20, 20,  0,  0,  0],
-                [5, -5,-10,  0,  0,-10, -5,  5],
-                [5, 10, 10,-20,-20, 10, 10,  5],
-                [0,  0,  0,  0,  0,  0,  0,  0]
-            ],
-            'knight': [
-                [-50,-40,-30,-30,-30,-30,-40,-50],
-                [-40,-20,  0,  0,  0,  0,-20,-40],
-                [-30,  0, 10, 15, 15, 10,  0,-30],
-                [-30,  5, 15, 20, 20, 15,  5,-30],
-                [-30,  0, 15, 20, 20, 15,  0,-30],
-                [-30,  5, 10, 15, 15, 10,  5,-30],
-                [-40,-20,  0,  5,  5,  0,-20,-40],
-                [-50,-40,-30,-30,-30,-30,-40,-50]
-            ],
-            'bishop': [
-                [-20,-10,-10,-10,-10,-10,-10,-20],
-                [-10,  0,  0,  0,  0,  0,  0,-10],
-                [-10,  0,  5, 10, 10,  5,  0,-10],
-                [-10,  5,  5, 10, 10,  5,  5,-10],
-                [-10,  0, 10, 10, 10, 10,  0,-10],
-                [-10, 10, 10, 10, 10, 10, 10,-10],
-                [-10,  5,  0,  0,  0,  0,  5,-10],
-                [-20,-10,-10,-10,-10,-10,-10,-20]
-            ],
-            'rook': [
-                [0,  0,  0,  0,  0,  0,  0,  0],
-                [5, 10, 10, 10, 10, 10, 10,  5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [0,  0,  0,  5,  5,  0,  0,  0]
-            ],
-            'queen': [
-                [-20,-10,-10, -5, -5,-10,-10,-20],
-                [-10,  0,  0,  0,  0,  0,  0,-10],
-                [-10,  0,  5,  5,  5,  5,  0,-10],
-                [-5,  0,  5,  5,  5,  5,  0, -5],
-                [0,  0,  5,  5,  5,  5,  0, -5],
-                [-10,  5,  5,  5,  5,  5,  0,-10],
-                [-10,  0,  5,  0,  0,  0,  0,-10],
-                [-20,-10,-10, -5, -5,-10,-10,-20]
-            ],
-            'king': [
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-20,-30,-30,-40,-40,-30,-30,-20],
-                [-10,-20,-20,-20,-20,-20,-20,-10],
-                [20, 20,  0,  0,  0,  0, 20, 20],
-                [20, 30, 10,  0,  0, 10, 30, 20]
-            ]
-        }
+        # Number of search processes; more than one switches get_best_move to Lazy SMP
+        self.threads = threads
+        # The Lazy SMP worker processes, started by the first parallel search and kept for the next
+        self.worker_pool = None
+        # Anything with is_set(); once set, the running search unwinds as if out of time
+        self.stop_event = None
+        # Debug prints on stdout; front ends that own stdout (UCI) turn them off
+        self.verbose = verbose
+        # Called as info_callback(depth, score, nodes, elapsed, pv) after each completed iteration,
+        # with the score from the side to move's point of view
+        self.info_callback = info_callback
+        self.piece_values = PIECE_VALUES
+        self.position_values = POSITION_VALUES
 
         self.DOUBLED_PAWN_PENALTY = -10
         self.ISOLATED_PAWN_PENALTY = -20
         self.BACKWARD_PAWN_PENALTY = -15
         self.PASSED_PAWN_BONUS = 25
         self.MOBILITY_BONUS = 10
-        self.CENTER_CONTROL_BONUS = 30
         self.CASTLING_BONUS = 60
         self.ROOK_ON_OPEN_FILE_BONUS = 25
         self.BISHOP_PAIR_BONUS = 50
         self.KNIGHT_OUTPOST_BONUS = 30
-        self.center_squares = {(3, 3), (3, 4), (4, 3), (4, 4)}
+
+        # Mobility is counted on an empty board, so it only depends on the square
+        self.mobility_values = {
+            'knight': [round(len(self.get_knight_moves(None, *divmod(sq, 8))) * self.MOBILITY_BONUS / 8) for sq in range(64)],
+            'bishop': [round(len(self.get_bishop_moves(None, *divmod(sq, 8))) * self.MOBILITY_BONUS / 13) for sq in range(64)],
+            'rook': [round(len(self.get_rook_moves(None, *divmod(sq, 8))) * self.MOBILITY_BONUS / 14) for sq in range(64)],
+        }
 
         self.opening_book = [
             [((6, 4), (4, 4)), ((1, 4), (3, 4))],  # e4 e5
@@ -93,24 +99,71 @@ class ChessAI:
             [((7, 6), (5, 5)), ((0, 1), (2, 2))],  # Nf3 Nc6
             [((6, 2), (4, 2)), ((1, 2), (3, 2))]   # c4 c5
         ]
+        # A Polyglot book (see book.py) takes the place of the openings above when given
+        self.book = PolyglotBook(book_path) if book_path else None
+        # Endgame tables from `python -m src.bitbases`; whichever are in bitbase_dir are used
+        self.bitbases = Bitbases(bitbase_dir) if bitbase_dir else None
 
-        self.start_time = 0
-        self.max_time = 0
+        self.time_manager = TimeManager()
+        self.max_nodes = None
         self.nodes = 0
-
-        self.transposition_table = {}
-
-    def get_best_move(self, board, max_time):
-        self.start_time = time.time()
-        self.max_time = max_time
+        self.root_value = 0
+        # Best root move so far in the iteration being searched
+        self.root_move = None
+        # Triangular PV table: pv_table[ply][ply:pv_length[ply]] is the best line found from ply
+        self.pv_table = [[0] * MAX_PLY for _ in range(MAX_PLY)]
+        self.pv_length = [0] * MAX_PLY
+        # The last iteration's PV, tried first while the search is still walking down it
+        self.previous_pv = []
+        self.follow_pv = False
+        # Quiet moves that caused a cutoff: two killers per ply, the reply to each
+        # opponent move (by from + 64 * to), and butterfly history per color
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.counter_moves = [0] * 4096
+        self.history = [[0] * 4096 for _ in COLORS]
+        # Per ply, the lists the move picker generates captures and quiet moves into
+        self.move_lists = [([], []) for _ in range(MAX_PLY)]
+        # Selective search; each can be switched off to trade nodes back for exactness
+        self.null_move_pruning = True
+        self.late_move_reductions = True
+        self.futility_pruning = True
+
+        # shared_hash names a table another process created; a parallel search shares its own with the workers
+        if shared_hash:
+            self.transposition_table = TranspositionTable.attach(shared_hash)
+        elif threads > 1:
+            self.transposition_table = TranspositionTable.create_shared(hash_size_mb)
+        else:
+            self.transposition_table = TranspositionTable(hash_size_mb)
+        self.pawn_table = PawnHashTable()
+        # Made on the first evaluate_boards() call, which is the only thing that needs NumPy
+        self.batch_evaluator = None
+
+    def get_best_move(self, board, max_time=None, max_depth=None, max_nodes=None,
+                      time_left=None, increment=0.0, moves_to_go=None):
+        """
+        Search board and return the move for self.color as a tuple.
+
+        max_time fixes the seconds for this move; otherwise time_left,
+        increment and moves_to_go (the side to move's clock) let the time
+        manager plan it. max_depth and max_nodes are optional further limits.
+        """
+        self.time_manager.start(max_time, time_left, increment, moves_to_go)
+        self.max_nodes = max_nodes
         self.nodes = 0
-        best_move = None
-        best_value = float('-inf') if self.color == 'white' else float('inf')
+        max_depth = min(max_depth or MAX_DEPTH, MAX_DEPTH)
 
         search_board = board.copy()
 
-        # Check opening book
-        if len(board.move_history) < 2:
+        if self.book:
+            # Looked up by position, so it answers at any ply without searching
+            book_move = self.book.choose(board)
+            if book_move:
+                if self.verbose:
+                    print(f"Book move: {to_tuple(book_move)}")
+                return to_tuple(book_move)
+        # Check opening book (only for games that began from the initial position)
+        elif board.initial_fen == STARTING_FEN and len(board.move_history) < 2:
             for opening in self.opening_book:
                 if len(board.move_history) == 0 and self.color == 'white':
                     return opening[0]
@@ -118,331 +171,525 @@ class ChessAI:
                     if board.move_history[0] == opening[0]:
                         return opening[1]
 
-        self.move_history = {}
+        self.transposition_table.new_search()
+        self.age_history()
 
-        # Iterative deepening
-        try:
-            # Start with depth 1 and increase
-            for depth in range(1, 5):
-                if self.is_time_up():
-                    break
-                
-                current_move = self.minimax(search_board, depth, float('-inf'), float('inf'), self.color == 'white', True)
+        def report(depth, move, value, pv=None):
+            move = to_tuple(move)
+            pv = [to_tuple(pv_move) for pv_move in pv] if pv else [move]
+            if self.info_callback:
+                score = value if self.color == 'white' else -value
+                self.info_callback(depth, score, self.nodes, self.time_manager.elapsed(), pv)
 
-                if current_move is not None and not self.is_time_up():
-                    best_move = current_move
-                    print(f"Depth {depth}: Found move {current_move}")
+            if self.verbose:
+                print(f"Depth {depth}: Found move {move}, line {pv}")
+                table = self.transposition_table
+                if table.probes:
+                    # Only this process's probes: under Lazy SMP the workers do the searching
+                    print(f"[DEBUG] Hash hit rate {table.hit_rate():.1%}, {table.hashfull() / 10:.1f}% full")
 
-                    piece_at_start = search_board.get_piece(current_move[0])
-                    print(f"[DEBUG] That move uses piece={piece_at_start}")
+                piece_at_start = search_board.get_piece(move[0])
+                print(f"[DEBUG] That move uses piece={piece_at_start}")
 
-        except TimeoutError:
-            pass
+        if self.threads > 1:
+            best_move = parallel_search(self, search_board, max_depth, max_nodes, report)
+        else:
+            best_move = self.iterative_deepening(search_board, range(1, max_depth + 1), report)
 
         if best_move:
+            best_move = to_tuple(best_move)
             test_board = board.copy()
-            if not test_board.move_piece(best_move[0], best_move[1], log=False):
+            promotion = best_move[2] if len(best_move) > 2 else 'queen'
+            if not test_board.move_piece(best_move[0], best_move[1], log=False, promotion=promotion):
                 # If it’s invalid, we can fallback to something else
-                print(f"AI's final move {best_move} is invalid in real board!")
+                if self.verbose:
+                    print(f"AI's final move {best_move} is invalid in real board!")
                 best_move = None
         
-        if best_move:
-            print(f"Final chosen move: {best_move}")
-        else:
-            print("Fallback Move")
+        if self.verbose:
+            if best_move:
+                print(f"Final chosen move: {best_move}")
+            else:
+                print("Fallback Move")
     
         return best_move or self.get_fallback_move(board)
     
-    def is_time_up(self):
-        return time.time() - self.start_time > self.max_time
-    
+    def iterative_deepening(self, board, depths, report):
+        # Search each depth in turn, calling report(depth, move, value, pv) whenever one completes in time
+        self.previous_pv = []
+        best_move = None
+        value = None
+        time_manager = self.time_manager
+        maximizing_player = self.color == 'white'
+        in_check = self.is_in_check(board, maximizing_player)
+        # In a bitbase ending with distances (or a draw) one ply finds the best move: every reply is exact
+        table_hit = self.bitbases.probe(board) if self.bitbases else None
+        exact_tables = table_hit is not None and (not table_hit[1] or table_hit[2] is not None)
+
+        try:
+            for depth in depths:
+                if best_move is not None and not time_manager.can_start_iteration():
+                    break
+
+                # Aspiration window: expect about the last score, and widen only the side that fails
+                self.root_move = None
+                delta = ASPIRATION_WINDOW
+                if value is None or abs(value) >= MATE_BOUND:
+                    alpha, beta = float('-inf'), float('inf')
+                else:
+                    alpha, beta = value - delta, value + delta
+                while True:
+                    self.follow_pv = True
+                    current_move = self.minimax(board, depth, alpha, beta, maximizing_player, True, in_check=in_check)
+                    value = self.root_value
+                    if current_move is None:
+                        break
+                    delta *= ASPIRATION_GROWTH
+                    if value <= alpha:
+                        alpha = value - delta if delta <= ASPIRATION_LIMIT else float('-inf')
+                    elif value >= beta:
+                        beta = value + delta if delta <= ASPIRATION_LIMIT else float('inf')
+                    else:
+                        break
+                if current_move is None:
+                    break
+
+                pv = self.pv_table[0][:self.pv_length[0]]
+                if not pv or pv[0] != current_move:
+                    pv = [current_move]
+                self.previous_pv = pv
+
+                time_manager.iteration_done(best_move is not None and current_move != best_move)
+                best_move = current_move
+                report(depth, current_move, value, pv)
+
+                # A mate this close has been seen in full; deeper searches cannot change it
+                if abs(value) >= MATE_BOUND and MATE_VALUE - abs(value) <= depth:
+                    break
+                if exact_tables:
+                    break
+
+        except TimeoutError:
+            # The first root move searched is the last iteration's best, so any
+            # move that already beat it in the unfinished iteration is better still
+            if self.root_move is not None:
+                best_move = self.root_move
+
+        return best_move
+
     def check_time(self):
-        if self.is_time_up():
+        if (self.time_manager.hard_limit_reached() or (self.stop_event is not None and self.stop_event.is_set())
+                or (self.max_nodes is not None and self.nodes >= self.max_nodes)):
             raise TimeoutError
 
-    def minimax(self, board, depth, alpha, beta, maximizing_player, root=False):
+    def minimax(self, board, depth, alpha, beta, maximizing_player, root=False, ply=0, in_check=False,
+                allow_null=True):
+        # in_check: whether the side to move is in check, worked out by the caller right after its move;
+        # allow_null is False right after a null move, so two never follow each other
         self.nodes += 1
+        self.pv_length[ply] = ply
         
-        if self.nodes % 1000 == 0:
+        if not self.nodes & (CHECK_INTERVAL - 1):
             self.check_time()
 
-        board_key = self.board_to_string(board)
-        tt_key = (board_key, depth, alpha, beta, maximizing_player)
-        if tt_key in self.transposition_table:
-            cached_value, cached_move = self.transposition_table[tt_key]
-            return cached_move if root else cached_value
+        if not root and self.bitbases:
+            # A drawn bitbase ending, or a won one with its distance to mate, needs no search.
+            # Won endings without distances are left to the search, scored by evaluate_board()
+            table_hit = self.bitbases.probe(board)
+            if table_hit is not None:
+                strong, win, distance = table_hit
+                if not win:
+                    return 0
+                if distance is not None:
+                    value = MATE_VALUE - (ply + distance)
+                    return value if strong == 0 else -value
 
         if depth == 0:
-            return self.quiescence(board, alpha, beta, maximizing_player, 0)
-
-        moves = self.get_ordered_moves(board, maximizing_player)
-        if not moves:
-            if self.is_in_check(board, maximizing_player):
-                return float('-inf') if maximizing_player else float('inf')
-            return 0  
+            self.follow_pv = False
+            return self.quiescence(board, alpha, beta, maximizing_player, 0, ply, in_check)
+
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = 0
+        entry = self.transposition_table.probe(board.hash)
+        if entry:
+            cached_value, cached_depth, bound, tt_move = entry
+            cached_value = value_from_tt(cached_value, ply)
+            if not root and cached_depth >= depth:
+                if bound == EXACT:
+                    return cached_value
+                if bound == LOWER_BOUND and cached_value >= beta:
+                    return cached_value
+                if bound == UPPER_BOUND and cached_value <= alpha:
+                    return cached_value
+
+        us = 0 if maximizing_player else 1
+        # Null-window nodes only: selectivity is not allowed to change the PV's score
+        pv_node = beta - alpha > 1
+        static_eval = None
+        if not root and not pv_node and not in_check:
+            static_eval = self.evaluate_board(board)
+
+            if (self.null_move_pruning and allow_null and depth >= NULL_MOVE_MIN_DEPTH
+                    and abs(beta if maximizing_player else alpha) < MATE_BOUND
+                    and (static_eval >= beta if maximizing_player else static_eval <= alpha)
+                    and self.has_non_pawn_material(board, us)):
+                # Zugzwang guard: with only king and pawns, passing can be better than any move
+                reduction = NULL_MOVE_REDUCTION + (depth >= NULL_MOVE_DEEP_DEPTH)
+                board.make_null_move()
+                if maximizing_player:
+                    value = self.minimax(board, max(depth - 1 - reduction, 0), beta - 1, beta, False,
+                                         ply=ply + 1, allow_null=False)
+                else:
+                    value = self.minimax(board, max(depth - 1 - reduction, 0), alpha, alpha + 1, True,
+                                         ply=ply + 1, allow_null=False)
+                board.unmake_null_move()
+                if maximizing_player and value >= beta:
+                    return beta
+                if not maximizing_player and value <= alpha:
+                    return alpha
+
+        futile = (self.futility_pruning and static_eval is not None and depth < len(FUTILITY_MARGINS)
+                  and abs(alpha if maximizing_player else beta) < MATE_BOUND
+                  and (static_eval + FUTILITY_MARGINS[depth] <= alpha if maximizing_player
+                       else static_eval - FUTILITY_MARGINS[depth] >= beta))
+
+        # The hash move is the best move from an earlier search of this position, or the
+        # last iteration's PV move while the search is still walking down it
+        hash_move = tt_move
+        if self.follow_pv:
+            self.follow_pv = False
+            if ply < len(self.previous_pv):
+                hash_move = self.previous_pv[ply]
+                self.follow_pv = True
+
+        captures, quiets = self._move_lists(ply)
+        moves = MovePicker(board, 'white' if maximizing_player else 'black', hash_move, self.killers[ply],
+                           self.counter_moves[board.previous_move() & 4095], self.history[us], captures, quiets)
 
         best_move = None
         best_value = float('-inf') if maximizing_player else float('inf')
 
-        for move in moves:
+        for index, move in enumerate(moves):
             
-            move_info = board.push_move_in_place(move[0], move[1])
-            eval = self.minimax(board, depth - 1, alpha, beta, not maximizing_player)
-
-            board.pop_move_in_place(move_info)
+            board.make_move(move)
+            gives_check = self.is_in_check(board, not maximizing_player)
+            quiet = not move & (CAPTURE_BIT | PROMOTION_BIT) and not gives_check
+            if futile and index > 0 and quiet:
+                # Even winning a little material here could not lift the score to alpha
+                board.unmake_move()
+                continue
+
+            if index == 0:
+                eval = self.minimax(board, depth - 1, alpha, beta, not maximizing_player, ply=ply + 1,
+                                    in_check=gives_check)
+            else:
+                reduction = 0
+                if (self.late_move_reductions and quiet and not in_check and depth >= LMR_MIN_DEPTH
+                        and index >= LMR_FULL_DEPTH_MOVES):
+                    reduction = min(LMR_REDUCTIONS[min(depth, MAX_DEPTH)][min(index, 63)], depth - 2)
+
+                # Principal variation search: with the first move presumed best, a null window only
+                # has to show each other move is no better; one that is gets a full re-search.
+                # A late quiet move is tried at reduced depth first, and at full depth only if it fails high
+                if maximizing_player:
+                    eval = self.minimax(board, depth - 1 - reduction, alpha, alpha + 1, False, ply=ply + 1,
+                                        in_check=gives_check)
+                    if reduction and eval > alpha:
+                        eval = self.minimax(board, depth - 1, alpha, alpha + 1, False, ply=ply + 1,
+                                            in_check=gives_check)
+                else:
+                    eval = self.minimax(board, depth - 1 - reduction, beta - 1, beta, True, ply=ply + 1,
+                                        in_check=gives_check)
+                    if reduction and eval < beta:
+                        eval = self.minimax(board, depth - 1, beta - 1, beta, True, ply=ply + 1,
+                                            in_check=gives_check)
+                if alpha < eval < beta:
+                    eval = self.minimax(board, depth - 1, alpha, beta, not maximizing_player, ply=ply + 1,
+                                        in_check=gives_check)
+
+            board.unmake_move()
             
             if maximizing_player:
                 if eval > best_value:
                     best_value = eval
                     best_move = move
+                improved = eval > alpha
                 alpha = max(alpha, eval)
             else:
                 if eval < best_value:
                     best_value = eval
                     best_move = move
+                improved = eval < beta
                 beta = min(beta, eval)
+
+            if improved:
+                # This move's line becomes the PV from here: the move, then the child's PV
+                pv_row, child_row = self.pv_table[ply], self.pv_table[ply + 1]
+                length = self.pv_length[ply + 1]
+                pv_row[ply] = move
+                pv_row[ply + 1:length] = child_row[ply + 1:length]
+                self.pv_length[ply] = length
+
+            if root and (improved or self.root_move is None):
+                # Only a move proven better than the window's bound may replace the one already kept
+                self.root_move = best_move
             
             if beta <= alpha:
-                if maximizing_player and eval >= beta:
-                    self.move_history[move] = self.move_history.get(move, 0) + depth * depth
-                elif not maximizing_player and eval <= alpha:
-                    self.move_history[move] = self.move_history.get(move, 0) + depth * depth
+                if not move & (CAPTURE_BIT | PROMOTION_BIT):
+                    self.update_quiet_stats(board, move, us, depth, ply)
                 break
-        
-        self.transposition_table[tt_key] = (best_value, best_move)
 
-        result = best_move if root else best_value
-        return result
-        
-    def quiescence(self, board, alpha, beta, maximizing_player, depth):
+        if best_move is None:
+            # No legal moves: checkmate (the sooner the better for the winner) or stalemate
+            if in_check:
+                best_value = -(MATE_VALUE - ply) if maximizing_player else MATE_VALUE - ply
+            else:
+                best_value = 0
+            if root:
+                self.root_value = best_value
+                return None
+            return best_value
+
+        if best_value <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_value >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(board.hash, depth, value_to_tt(best_value, ply), bound, best_move)
 
-        self.nodes += 1
-        if depth > 3 or self.is_time_up():
-            return self.evaluate_board(board, depth)
-        
-        stand_pat = self.evaluate_board(board, depth)
+        if root:
+            self.root_value = best_value
+            return best_move
+        return best_value
         
-        if maximizing_player:
-            if stand_pat >= beta:
-                return beta
-            alpha = max(alpha, stand_pat)
+    def quiescence(self, board, alpha, beta, maximizing_player, depth, ply=0, in_check=False):
+        # depth counts quiescence plies from 0; quiet checks are only tried at the first one
+        self.nodes += 1
+        self.pv_length[ply] = ply
+        if not self.nodes & (CHECK_INTERVAL - 1):
+            self.check_time()
+
+        captures, quiets = self._move_lists(ply)
+        if in_check:
+            # Standing pat is no option in check: every evasion is searched, and with none it is mate
+            moves = self.get_ordered_moves(board, maximizing_player, moves=captures)
+            if not moves:
+                return -(MATE_VALUE - ply) if maximizing_player else MATE_VALUE - ply
+            if ply >= MAX_PLY - 1:
+                return self.evaluate_board(board)
+            best_value = float('-inf') if maximizing_player else float('inf')
         else:
-            if stand_pat <= alpha:
-                return alpha
-            beta = min(beta, stand_pat)
+            stand_pat = self.evaluate_board(board)
+            if ply >= MAX_PLY - 1:
+                return stand_pat
+            if maximizing_player:
+                if stand_pat >= beta:
+                    return beta
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return alpha
+                beta = min(beta, stand_pat)
+            best_value = stand_pat
 
-        moves = self.get_ordered_moves(board, maximizing_player, captures_only=False)
+            moves = board.move_generator.tactical_moves('white' if maximizing_player else 'black', captures)
+            squares = board.squares
+            moves.sort(key=lambda move: capture_score(squares, move), reverse=True)
 
-        filtered_moves = []
         for move in moves:
-            captured_piece = board.get_piece(move[1])
-            if captured_piece:
-                filtered_moves.append(move)
+            if not in_check:
+                if not move & PROMOTION_BIT:
+                    # Delta pruning: not even taking the victim for free would bring the score up to alpha
+                    victim = board.squares[(move >> 6) & 63]
+                    gain = SEE_VALUES[PAWN if victim is None else victim % 6] + DELTA_MARGIN
+                    if stand_pat + gain <= alpha if maximizing_player else stand_pat - gain >= beta:
+                        continue
+                if see(board, move) < 0:
+                    continue
+
+            board.make_move(move)
+            gives_check = self.is_in_check(board, not maximizing_player)
+            value = self.quiescence(board, alpha, beta, not maximizing_player, depth + 1, ply + 1, gives_check)
+            board.unmake_move()
+
+            if maximizing_player:
+                best_value = max(best_value, value)
+                alpha = max(alpha, value)
             else:
-                # Temporarily push to see if it gives check
-                move_info = board.push_move_in_place(move[0], move[1])
-                opponent = 'black' if maximizing_player else 'white'
-                if board.game_rules.is_in_check(opponent):
-                    filtered_moves.append(move)
-                board.pop_move_in_place(move_info)
-
-        if maximizing_player:
-            max_eval = stand_pat
-            for move in filtered_moves:
-                if self.is_time_up():
-                    break
-                move_info = board.push_move_in_place(move[0], move[1])
-                eval_ = self.quiescence(board, alpha, beta, False, depth + 1)
-                board.pop_move_in_place(move_info)
+                best_value = min(best_value, value)
+                beta = min(beta, value)
+            if beta <= alpha:
+                return best_value
+
+        if depth == 0 and not in_check:
+            # Quiet checks, at the first quiescence ply only. A move can only give check if it lands
+            # where it attacks the king, moves off a line to the king, or castles
+            king_sq = board.king_squares[1 if maximizing_player else 0]
+            lines = ORTHOGONAL_LINES[king_sq] | DIAGONAL_LINES[king_sq]
+            check_squares = lines | KNIGHT_ATTACKS[king_sq]
+            moves = board.move_generator.legal_moves('white' if maximizing_player else 'black', moves=quiets,
+                                                     quiets_only=True)
+            for move in moves:
+                flag = move >> 12
+                if not ((check_squares >> ((move >> 6) & 63)) & 1 or (lines >> (move & 63)) & 1
+                        or flag == KING_CASTLE or flag == QUEEN_CASTLE):
+                    continue
+                if flag & PROMOTION or see(board, move) < 0:
+                    continue
 
-                max_eval = max(max_eval, eval_)
-                alpha = max(alpha, eval_)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = stand_pat
-            for move in filtered_moves:
-                if self.is_time_up():
-                    break
-                move_info = board.push_move_in_place(move[0], move[1])
-                eval_ = self.quiescence(board, alpha, beta, True, depth + 1)
-                board.pop_move_in_place(move_info)
+                board.make_move(move)
+                if not self.is_in_check(board, not maximizing_player):
+                    board.unmake_move()
+                    continue
+                value = self.quiescence(board, alpha, beta, not maximizing_player, depth + 1, ply + 1, True)
+                board.unmake_move()
 
-                min_eval = min(min_eval, eval_)
-                beta = min(beta, eval_)
+                if maximizing_player:
+                    best_value = max(best_value, value)
+                    alpha = max(alpha, value)
+                else:
+                    best_value = min(best_value, value)
+                    beta = min(beta, value)
                 if beta <= alpha:
                     break
-            return min_eval
+
+        return best_value
     
     def get_fallback_move(self, board):
         moves = self.get_ordered_moves(board, self.color == 'white')
         if moves:
-            return moves[0]
+            return to_tuple(moves[0])
         return None
 
-    def get_ordered_moves(self, board, maximizing_player, captures_only=False):
-        moves = []
+    def _move_lists(self, ply):
+        # The reusable (captures, quiets) move lists for this ply, emptied
+        if ply >= len(self.move_lists):
+            self.move_lists.extend(([], []) for _ in range(ply + 1 - len(self.move_lists)))
+        captures, quiets = self.move_lists[ply]
+        captures.clear()
+        quiets.clear()
+        return captures, quiets
+
+    def update_quiet_stats(self, board, move, us, depth, ply):
+        # A quiet move refuted the opponent's last move: remember it as a killer, a counter-move and in history
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.counter_moves[board.previous_move() & 4095] = move
+        self.history[us][move & 4095] += depth * depth
+
+    def age_history(self):
+        # Called before each new search: history fades instead of being thrown away, killers start over
+        for table in self.history:
+            table[:] = [value >> 1 for value in table]
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+
+    def get_ordered_moves(self, board, maximizing_player, captures_only=False, moves=None):
+        # Legal 16-bit moves, best first: captures by MVV-LVA, then quiet moves by history
         color = 'white' if maximizing_player else 'black'
+        moves = board.move_generator.legal_moves(color, captures_only, moves)
+        return order_moves(board.squares, self.history[0 if maximizing_player else 1], moves)
 
-        def move_score(move):
-            score = 0
-            start, end = move
-            moving_piece = board.get_piece(start)
-            captured_piece = board.get_piece(end)
-            
-            # Capture scoring
-            if captured_piece:
-                score += 10 * self.piece_values[captured_piece.type] - self.piece_values[moving_piece.type]
-            
-            # Center control
-            if end in self.center_squares:
-                score += self.CENTER_CONTROL_BONUS
-            
-            # History heuristic
-            score += self.move_history.get(move, 0)
-            
-            # Promotion potential
-            if moving_piece.type == 'pawn' and (end[0] == 0 or end[0] == 7):
-                score += self.piece_values['queen']
-            
-             # Promotion potential
-            if moving_piece.type == 'pawn' and (end[0] == 0 or end[0] == 7):
-                score += self.piece_values['queen']
-                
-            # Castling bonus (if move is a castling move)
-            if moving_piece.type == 'king' and abs(start[1] - end[1]) == 2:
-                score += 50  # Significant bonus for castling
-
-            # En passant
-            if moving_piece.type == 'pawn' and abs(start[1] - end[1]) == 1:
-                if not captured_piece and board.last_double_pawn_move:
-                    if board.last_double_pawn_move[1] == end[1]:  # Valid en passant capture
-                        score += 15
-
-            import random
-            score += random.uniform(-0.1, 0.1)
-            
-            return score
-        
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece and piece.color == color:
-                    for end_row in range(8):
-                        for end_col in range(8):
-                            if board.move_validator.is_valid_move((row, col), (end_row, end_col)):
-                                move = ((row, col), (end_row, end_col))
-                                if not captures_only or board.get_piece((end_row, end_col)):
-                                    moves.append(move)
-
-        return sorted(moves, key=move_score, reverse=True)
+    def has_non_pawn_material(self, board, us):
+        bitboards = board.bitboards
+        base = us * 6
+        return bool(bitboards[base + KNIGHT] | bitboards[base + BISHOP] | bitboards[base + ROOK]
+                    | bitboards[base + QUEEN])
 
     def get_all_possible_moves(self, board, color):
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece and piece.color == color:
-                    for end_row in range(8):
-                        for end_col in range(8):
-                            if board.move_validator.is_valid_move((row, col), (end_row, end_col)):
-                                moves.append(((row, col), (end_row, end_col)))
-        return moves
+        return board.legal_moves(color)
 
     def make_move(self, board, move):
         new_board = copy.deepcopy(board)
-        new_board.move_piece(move[0], move[1], log=False)
+        new_board.move_piece(move[0], move[1], log=False, promotion=move[2] if len(move) > 2 else 'queen')
         return new_board
 
     def is_game_over(self, board):
         return board.game_rules.is_checkmate('white') or board.game_rules.is_checkmate('black') or board.game_rules.is_stalemate('white')
 
-    def evaluate_board(self, board, depth = 0):
-        if board.game_rules.is_checkmate('white'):
-            return -(999999) + depth
-        if board.game_rules.is_checkmate('black'):
-            return 999999 - depth
-
-        score = 0
-        w_bishops = 0
-        b_bishops = 0
-
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if not piece:
-                    continue
-
-                value = self.piece_values[piece.type]
-                is_white = piece.color == 'white'
-                multiplier = 1 if is_white else -1
-
-                # Basic material score
-                score += value * multiplier
-
-                # Track bishops for bishop pair bonus
-                if piece.type == 'bishop':
-                    if is_white:
-                        w_bishops += 1
-                    else:
-                        b_bishops += 1
-
-                # Piece-specific bonuses
-                if piece.type == 'pawn':
-                    score += self.evaluate_pawn(board, row, col, is_white) * multiplier
-                elif piece.type == 'knight':
-                    score += self.evaluate_knight(board, row, col, is_white) * multiplier
-                elif piece.type == 'bishop':
-                    score += self.evaluate_bishop(board, row, col, is_white) * multiplier
-                elif piece.type == 'rook':
-                    score += self.evaluate_rook(board, row, col, is_white) * multiplier
-                elif piece.type == 'king':
-                    score += self.evaluate_king(board, row, col, is_white) * multiplier
-
-        # Bishop pair bonus
-        if w_bishops >= 2:
-            score += self.BISHOP_PAIR_BONUS
-        if b_bishops >= 2:
-            score -= self.BISHOP_PAIR_BONUS
-
-        return score
+    def evaluate_board(self, board):
+        # Purely positional: checkmate and stalemate are scored by the search, which
+        # finds out for free when a side has no legal moves
+
+        table_bonus = 0
+        if self.bitbases:
+            table_hit = self.bitbases.probe(board)
+            if table_hit is not None:
+                strong, win, distance = table_hit
+                if not win:
+                    return 0
+                if distance is not None:
+                    # Never a mate score, which would need the ply; nearer mates still score higher
+                    value = BITBASE_WIN - distance
+                    return value if strong == 0 else -value
+                # Without distances the usual terms below have to lead the way to mate
+                table_bonus = BITBASE_WIN if strong == 0 else -BITBASE_WIN
+
+        # Material and piece-square values are kept up to date by the board on every move
+        score = board.material[0] - board.material[1] + board.pst[0] - board.pst[1]
+        white_pawns, black_pawns = self.pawn_structure_scores(board)
+        score += white_pawns - black_pawns
+
+        for is_white, multiplier, base in ((True, 1, 0), (False, -1, 6)):
+            bitboards = board.bitboards
+            side_score = 0
+
+            # Piece-specific bonuses
+            for sq in iter_bits(bitboards[base + KNIGHT]):
+                side_score += self.evaluate_knight(board, sq >> 3, sq & 7, is_white)
+            for sq in iter_bits(bitboards[base + BISHOP]):
+                side_score += self.evaluate_bishop(board, sq >> 3, sq & 7, is_white)
+            for sq in iter_bits(bitboards[base + ROOK]):
+                side_score += self.evaluate_rook(board, sq >> 3, sq & 7, is_white)
+            for sq in iter_bits(bitboards[base + KING]):
+                side_score += self.evaluate_king(board, sq >> 3, sq & 7, is_white)
+
+            # Bishop pair bonus
+            if popcount(bitboards[base + BISHOP]) >= 2:
+                side_score += self.BISHOP_PAIR_BONUS
+
+            score += side_score * multiplier
+
+        return score + table_bonus
+
+    def evaluate_boards(self, boards):
+        """
+        evaluate_board() for many positions at once, vectorized with NumPy for
+        offline work such as scoring a game collection. Returns an int64 array.
+        """
+        # Imported here so that NumPy is only loaded by the programs that batch-evaluate
+        from src.engine.batch_eval import BatchEvaluator, encode_boards
+
+        if self.batch_evaluator is None:
+            self.batch_evaluator = BatchEvaluator(self)
+        scores = self.batch_evaluator.evaluate(encode_boards(boards))
+        if self.bitbases:
+            # Bitbase endings are few and need a probe each, which evaluate_board makes
+            for index, board in enumerate(boards):
+                if popcount(board.occupied) == 3:
+                    scores[index] = self.evaluate_board(board)
+        return scores
     
     def evaluate_pawn(self, board, row, col, is_white):
         score = 0
+        color = 'white' if is_white else 'black'
+        enemy = 'black' if is_white else 'white'
+        own_pawns = board.bitboards[PIECE_INDEX[color, 'pawn']]
+        enemy_pawns = board.bitboards[PIECE_INDEX[enemy, 'pawn']]
         
         # Check for doubled pawns
-        pawns_in_file = 0
-        for r in range(8):
-            piece = board.get_piece((r, col))
-            if piece and piece.type == 'pawn' and piece.color == ('white' if is_white else 'black'):
-                pawns_in_file += 1
-        if pawns_in_file > 1:
+        if popcount(own_pawns & FILE_MASKS[col]) > 1:
             score += self.DOUBLED_PAWN_PENALTY
 
         # Check for isolated pawns
-        isolated = True
-        for adjacent_col in [col-1, col+1]:
-            if 0 <= adjacent_col < 8:
-                for r in range(8):
-                    piece = board.get_piece((r, adjacent_col))
-                    if piece and piece.type == 'pawn' and piece.color == ('white' if is_white else 'black'):
-                        isolated = False
-                        break
-        if isolated:
+        if not own_pawns & ADJACENT_FILE_MASKS[col]:
             score += self.ISOLATED_PAWN_PENALTY
 
-        # Passed pawn check
-        passed = True
-        direction = -1 if is_white else 1
-        for r in range(row + direction, 0 if is_white else 7, direction):
-            for c in [col-1, col, col+1]:
-                if 0 <= c < 8:
-                    piece = board.get_piece((r, c))
-                    if piece and piece.type == 'pawn' and piece.color != ('white' if is_white else 'black'):
-                        passed = False
-                        break
-        if passed:
+        # Passed pawn check: no enemy pawn ahead on this or an adjacent file
+        if not enemy_pawns & PASSED_PAWN_MASKS[COLOR_INDEX[color]][row * 8 + col]:
             score += self.PASSED_PAWN_BONUS
 
         return score
@@ -455,8 +702,7 @@ class ChessAI:
             score += self.KNIGHT_OUTPOST_BONUS
 
         # Mobility
-        mobility = len(self.get_knight_moves(board, row, col))
-        score += mobility * (self.MOBILITY_BONUS / 8)  # Normalize by max possible moves
+        score += self.mobility_values['knight'][row * 8 + col]
 
         return score
     
@@ -464,8 +710,7 @@ class ChessAI:
         score = 0
         
         # Mobility
-        mobility = len(self.get_bishop_moves(board, row, col))
-        score += mobility * (self.MOBILITY_BONUS / 13)  # Normalize by max possible moves
+        score += self.mobility_values['bishop'][row * 8 + col]
 
         return score
     
@@ -473,34 +718,21 @@ class ChessAI:
         score = 0
         
         # Check for open file
-        open_file = True
-        for r in range(8):
-            piece = board.get_piece((r, col))
-            if piece and piece.type == 'pawn':
-                open_file = False
-                break
-        if open_file:
+        pawns = board.bitboards[PIECE_INDEX['white', 'pawn']] | board.bitboards[PIECE_INDEX['black', 'pawn']]
+        if not pawns & FILE_MASKS[col]:
             score += self.ROOK_ON_OPEN_FILE_BONUS
 
         # Mobility
-        mobility = len(self.get_rook_moves(board, row, col))
-        score += mobility * (self.MOBILITY_BONUS / 14)  # Normalize by max possible moves
+        score += self.mobility_values['rook'][row * 8 + col]
 
         return score
     
     def evaluate_king(self, board, row, col, is_white):
         score = 0
         
-        # King safety (simplified)
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                new_row, new_col = row + dr, col + dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    piece = board.get_piece((new_row, new_col))
-                    if piece and piece.color == ('white' if is_white else 'black'):
-                        score += 5  # Bonus for friendly pieces near king
+        # King safety (simplified): bonus for friendly pieces near king
+        own_pieces = board.occupancy[0 if is_white else 1]
+        score += 5 * popcount(KING_ATTACKS[row * 8 + col] & own_pieces)
 
         return score
 
@@ -534,13 +766,9 @@ class ChessAI:
 
     def is_outpost(self, board, row, col, is_white):
         # Check if knight is protected by friendly pawn
-        pawn_row = row + (1 if is_white else -1)
-        for dc in [-1, 1]:
-            if 0 <= pawn_row < 8 and 0 <= col + dc < 8:
-                piece = board.get_piece((pawn_row, col + dc))
-                if piece and piece.type == 'pawn' and piece.color == ('white' if is_white else 'black'):
-                    return True
-        return False
+        own_pawns = board.bitboards[PIECE_INDEX['white' if is_white else 'black', 'pawn']]
+        # A friendly pawn defends this square from where an enemy pawn here would attack
+        return bool(PAWN_ATTACKS[1 if is_white else 0][row * 8 + col] & own_pawns)
 
     def is_in_check(self, board, is_white):
         return board.game_rules.is_in_check('white' if is_white else 'black')
@@ -563,34 +791,26 @@ class ChessAI:
 
     def evaluate_pawn_structure(self, board, color):
         score = 0
+        pawns = board.bitboards[PIECE_INDEX[color, 'pawn']]
         for col in range(8):
-            pawns = 0
-            for row in range(8):
-                piece = board.get_piece((row, col))
-                if piece and piece.type == 'pawn' and piece.color == color:
-                    pawns += 1
-            if pawns > 1:
-                score -= 5 * (pawns - 1)  # Penalty for doubled pawns
+            file_pawns = popcount(pawns & FILE_MASKS[col])
+            if file_pawns > 1:
+                score -= 5 * (file_pawns - 1)  # Penalty for doubled pawns
         return score
 
+    def pawn_structure_scores(self, board):
+        # Doubled/isolated/passed terms summed over each side's pawns, cached by pawn hash
+        scores = self.pawn_table.probe(board.pawn_hash)
+        if scores is None:
+            scores = tuple(
+                sum(self.evaluate_pawn(board, sq >> 3, sq & 7, is_white) for sq in iter_bits(board.bitboards[index]))
+                for is_white, index in ((True, PIECE_INDEX['white', 'pawn']), (False, PIECE_INDEX['black', 'pawn']))
+            )
+            self.pawn_table.store(board.pawn_hash, *scores)
+        return scores
+
     def find_king(self, board, color):
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece and piece.type == 'king' and piece.color == color:
-                    return (row, col)
-        return None
-    
-    def board_to_string(self, board):
-        s = []
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece:
-                    s.append(piece.color[0].upper() if piece.color == 'white' else piece.color[0].lower())
-                    s.append(piece.type[0])  # e.g. 'k' for king, 'q' for queen, etc
-                else:
-                    s.append('.')
-        # add side to move
-        s.append(board.game_state.get_current_turn()[0])
-        return ''.join(s)
\ No newline at end of file
+        king_sq = board.king_squares[COLOR_INDEX[color]]
+        if king_sq is None:
+            return None
+        return divmod(king_sq, 8)
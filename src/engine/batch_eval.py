@@ -0,0 +1,117 @@
+# engine/batch_eval.py
+#
+# ChessAI.evaluate_board for many positions at once, with NumPy. Positions
+# are encoded as an (N, 12, 64) array of piece planes, one plane per
+# bitboard index (color * 6 + type) and one column per square, and every
+# evaluation term becomes a handful of array operations over all N at once.
+#
+# NumPy is optional: only this module needs it, and only when it is used.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.board.bitboard import (
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, KING, KING_ATTACKS, PAWN_ATTACKS, PASSED_PAWN_MASKS
+)
+from src.board.piece_square import MATERIAL_VALUES, PIECE_SQUARE_VALUES
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs NumPy: pip install numpy")
+
+
+def _bitboard_matrix(table):
+    # (64, 64) with matrix[s, t] set when t is in table[s]
+    return np.array([[(table[sq] >> target) & 1 for target in range(64)] for sq in range(64)], dtype=np.float32)
+
+
+def encode_boards(boards):
+    """
+    Piece planes for a sequence of ChessBoards: a uint8 array of shape
+    (N, 12, 64) with planes[n, index, sq] set when board n has the piece
+    with that bitboard index on sq.
+    """
+    _require_numpy()
+    bitboards = np.array([board.bitboards for board in boards], dtype='<u8').reshape(-1, 12)
+    return np.unpackbits(bitboards.view(np.uint8).reshape(-1, 12, 8), axis=2, bitorder='little')
+
+
+class BatchEvaluator:
+    """
+    Vectorized evaluate_board() with the weights of one ChessAI.
+
+    evaluate(planes) scores the (N, 12, 64) planes from encode_boards() from
+    white's point of view, term for term the same as evaluate_board() (which
+    also consults the bitbases; ChessAI.evaluate_boards() takes care of that).
+    Everything linear in the pieces is a single matrix product; the rest works
+    on per-file pawn counts and on which squares pawns and kings cover.
+    """
+
+    def __init__(self, ai):
+        _require_numpy()
+        self.ai = ai
+        # Material, piece-square and mobility values of every (piece, square), signed for the side
+        linear = np.array(PIECE_SQUARE_VALUES, dtype=np.float32) + np.array(MATERIAL_VALUES, dtype=np.float32)[:, None]
+        for base in (0, 6):
+            linear[base + KNIGHT] += ai.mobility_values['knight']
+            linear[base + BISHOP] += ai.mobility_values['bishop']
+            linear[base + ROOK] += ai.mobility_values['rook']
+        linear[6:] *= -1
+        self.linear = linear.reshape(768)
+        # Square => file, to count pieces per file
+        self.files = np.array([[sq & 7 == col for col in range(8)] for sq in range(64)], dtype=np.float32)
+        self.king_zone = _bitboard_matrix(KING_ATTACKS)
+        # passed_masks[color][t, s]: an enemy pawn on t stops a pawn of color on s from being passed
+        self.passed_masks = [_bitboard_matrix(PASSED_PAWN_MASKS[color]).T.copy() for color in (WHITE, BLACK)]
+        # pawn_guards[color][t, s]: a pawn of color on t defends s
+        self.pawn_guards = [_bitboard_matrix(PAWN_ATTACKS[1 - color]).T.copy() for color in (WHITE, BLACK)]
+
+    def evaluate(self, planes):
+        ai = self.ai
+        planes = np.asarray(planes)
+        count = planes.shape[0]
+        pieces = planes.reshape(count, 768).astype(np.float32)
+        score = pieces @ self.linear
+
+        def plane(index):
+            return pieces[:, index * 64:(index + 1) * 64]
+
+        pawns = (plane(PAWN), plane(6 + PAWN))
+        pawn_files = [side_pawns @ self.files for side_pawns in pawns]
+        open_files = (pawn_files[0] + pawn_files[1]) == 0
+
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            base = color * 6
+            own_pawns, enemy_pawns = pawns[color], pawns[1 - color]
+            files = pawn_files[color]
+
+            # Pawn structure: every pawn of a doubled file pays, as does every isolated one
+            neighbours = np.zeros_like(files)
+            neighbours[:, 1:] += files[:, :-1]
+            neighbours[:, :-1] += files[:, 1:]
+            doubled = np.einsum('nf,nf->n', files, files > 1)
+            isolated = np.einsum('nf,nf->n', files, neighbours == 0)
+            passed = np.einsum('ns,ns->n', own_pawns, (enemy_pawns @ self.passed_masks[color]) == 0)
+            side = (doubled * ai.DOUBLED_PAWN_PENALTY + isolated * ai.ISOLATED_PAWN_PENALTY
+                    + passed * ai.PASSED_PAWN_BONUS)
+
+            knights = plane(base + KNIGHT)
+            outposts = np.einsum('ns,ns->n', knights, (own_pawns @ self.pawn_guards[color]) > 0)
+            side += outposts * ai.KNIGHT_OUTPOST_BONUS
+
+            side += (plane(base + BISHOP).sum(axis=1) >= 2) * ai.BISHOP_PAIR_BONUS
+
+            rook_files = plane(base + ROOK) @ self.files
+            side += np.einsum('nf,nf->n', rook_files, open_files) * ai.ROOK_ON_OPEN_FILE_BONUS
+
+            # King safety: five for every own piece next to the king
+            own_pieces = pieces[:, base * 64:(base + 6) * 64].reshape(count, 6, 64)
+            king_zone = plane(base + KING) @ self.king_zone
+            side += 5 * np.einsum('ns,nps->n', king_zone, own_pieces)
+
+            score += sign * side
+
+        return np.rint(score).astype(np.int64)
@@ -0,0 +1,259 @@
+# engine/bitbase.py
+#
+# Endgame bitbases for king and pawn, rook or queen against a lone king,
+# generated by retrograde analysis and kept on disk.
+#
+# A table has one entry per (side to move, strong king, weak king, piece)
+# with the strong side as white, 2 * 64 ** 3 in all; a position with black as
+# the strong side is looked up with its rows mirrored. The .wdl file holds one
+# bit per entry, set where the strong side wins (the lone king can at best
+# draw). The optional .dtm file holds one byte per entry: plies to mate plus
+# one for a win, 0 otherwise. Both are memory-mapped, so probing reads only
+# the pages it touches.
+
+import mmap
+import os
+
+from src.board.bitboard import (
+    WHITE, BLACK, PAWN, ROOK, QUEEN, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, popcount,
+    iter_bits
+)
+from src.engine.polyglot import FLIP
+
+# Where ChessAI looks for tables unless told otherwise
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                 'assets', 'bitbases')
+
+TABLES = ('KQK', 'KRK', 'KPK')
+TABLE_PIECES = {'KPK': PAWN, 'KRK': ROOK, 'KQK': QUEEN}
+TABLE_SIZE = 2 << 18
+
+# Entry states while generating
+UNKNOWN, WIN, DRAW, ILLEGAL = 0, 1, 2, 3
+
+
+def table_index(black_to_move, strong_king, weak_king, piece):
+    return (black_to_move << 18) | (strong_king << 12) | (weak_king << 6) | piece
+
+
+def _piece_attacks(piece_type, sq, occupied):
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[WHITE][sq]
+    if piece_type == ROOK:
+        return rook_attacks(sq, occupied)
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+def generate(name, promotion_tables=None):
+    """
+    Solve one table by retrograde analysis and return (wdl, dtm) as bytearrays.
+
+    Starting from every mate, positions are resolved in order of distance:
+    a white-to-move position wins as soon as one move reaches a black loss,
+    a black-to-move position loses once the last of its moves is shown to
+    reach a white win. Whatever is never reached is a draw. KPK needs the
+    finished KQK and KRK tables (promotion_tables, name => (wdl, dtm)) for its
+    promotions; promoting to a bishop or knight never wins.
+    """
+    piece_type = TABLE_PIECES[name]
+    state = bytearray(TABLE_SIZE)
+    dtm = bytearray(TABLE_SIZE)
+    remaining = bytearray(TABLE_SIZE)
+    # buckets[d]: positions claimed to be decided d plies from mate, resolved in order of d
+    buckets = [[]]
+
+    for strong_king in range(64):
+        strong_bit = 1 << strong_king
+        for weak_king in range(64):
+            weak_bit = 1 << weak_king
+            if weak_king == strong_king or KING_ATTACKS[strong_king] & weak_bit:
+                for piece in range(64):
+                    state[table_index(0, strong_king, weak_king, piece)] = ILLEGAL
+                    state[table_index(1, strong_king, weak_king, piece)] = ILLEGAL
+                continue
+            for piece in range(64):
+                white_index = table_index(0, strong_king, weak_king, piece)
+                black_index = white_index | (1 << 18)
+                piece_bit = 1 << piece
+                if piece_bit & (strong_bit | weak_bit) or (piece_type == PAWN and piece >> 3 in (0, 7)):
+                    state[white_index] = state[black_index] = ILLEGAL
+                    continue
+
+                # Squares white covers with the lone king out of the way
+                covered = KING_ATTACKS[strong_king] | _piece_attacks(piece_type, piece, strong_bit)
+                if covered & weak_bit:
+                    # White to move with black in check cannot happen
+                    state[white_index] = ILLEGAL
+                elif piece_type == PAWN and piece >> 3 == 1 and not (piece_bit >> 8) & (strong_bit | weak_bit):
+                    # Promotion: the result is whatever the queen or rook table says with black to move
+                    best = None
+                    for table in ('KQK', 'KRK'):
+                        table_wdl, table_dtm = promotion_tables[table]
+                        index = table_index(1, strong_king, weak_king, piece - 8)
+                        if table_wdl[index >> 3] >> (index & 7) & 1:
+                            distance = table_dtm[index]
+                            if best is None or distance < best:
+                                best = distance
+                    if best is not None:
+                        while len(buckets) <= best:
+                            buckets.append([])
+                        buckets[best].append(white_index)
+
+                escapes = KING_ATTACKS[weak_king] & ~covered & ~strong_bit
+                if escapes & piece_bit:
+                    # The lone king takes the piece
+                    state[black_index] = DRAW
+                elif not escapes:
+                    if covered & weak_bit:
+                        buckets[0].append(black_index)
+                    else:
+                        state[black_index] = DRAW
+                else:
+                    remaining[black_index] = popcount(escapes)
+
+    distance = 0
+    while distance < len(buckets):
+        claims = buckets[distance]
+        if claims and len(buckets) == distance + 1:
+            buckets.append([])
+        following = buckets[distance + 1] if claims else None
+        for index in claims:
+            if state[index] != UNKNOWN:
+                continue
+            state[index] = WIN
+            dtm[index] = distance + 1
+            strong_king, weak_king, piece = (index >> 12) & 63, (index >> 6) & 63, index & 63
+            occupied = (1 << strong_king) | (1 << weak_king) | (1 << piece)
+
+            if index >> 18:
+                # Black to move and lost: every white move into it wins
+                for square in iter_bits(KING_ATTACKS[strong_king] & ~occupied):
+                    previous = table_index(0, square, weak_king, piece)
+                    if state[previous] == UNKNOWN:
+                        following.append(previous)
+                if piece_type == PAWN:
+                    origins = []
+                    if piece >> 3 < 6 and not (occupied >> (piece + 8)) & 1:
+                        origins.append(piece + 8)
+                        if piece >> 3 == 4 and not (occupied >> (piece + 16)) & 1:
+                            origins.append(piece + 16)
+                else:
+                    origins = iter_bits(_piece_attacks(piece_type, piece, occupied) & ~occupied)
+                for square in origins:
+                    previous = table_index(0, strong_king, weak_king, square)
+                    if state[previous] == UNKNOWN:
+                        following.append(previous)
+            else:
+                # White to move and winning: one more black move into it is lost
+                for square in iter_bits(KING_ATTACKS[weak_king] & ~occupied & ~KING_ATTACKS[strong_king]):
+                    previous = table_index(1, strong_king, square, piece)
+                    if state[previous] == UNKNOWN:
+                        remaining[previous] -= 1
+                        if not remaining[previous]:
+                            following.append(previous)
+        distance += 1
+
+    wdl = bytearray(TABLE_SIZE >> 3)
+    for index in range(TABLE_SIZE):
+        if state[index] == WIN:
+            wdl[index >> 3] |= 1 << (index & 7)
+        else:
+            dtm[index] = 0
+    return wdl, dtm
+
+
+def generate_all(directory, with_dtm=True, report=None):
+    # Solve and write every table not on disk yet; report(name) is called before each one
+    os.makedirs(directory, exist_ok=True)
+    solved = {}
+    for name in TABLES:
+        wdl_path = os.path.join(directory, name + '.wdl')
+        dtm_path = os.path.join(directory, name + '.dtm')
+        if os.path.exists(wdl_path) and (not with_dtm or os.path.exists(dtm_path)):
+            with open(wdl_path, 'rb') as wdl_file:
+                wdl = wdl_file.read()
+            dtm = bytes(TABLE_SIZE)
+            if os.path.exists(dtm_path):
+                with open(dtm_path, 'rb') as dtm_file:
+                    dtm = dtm_file.read()
+            # Kept for KPK's promotions; without distances its own are off, but not its results
+            solved[name] = (wdl, dtm)
+            continue
+        if report:
+            report(name)
+        wdl, dtm = generate(name, solved)
+        solved[name] = (wdl, dtm)
+        with open(wdl_path, 'wb') as wdl_file:
+            wdl_file.write(wdl)
+        if with_dtm:
+            with open(dtm_path, 'wb') as dtm_file:
+                dtm_file.write(dtm)
+
+
+class Bitbases:
+    """
+    The tables found in a directory, memory-mapped, and probes against them.
+
+    probe(board) returns None when the position is not covered, otherwise
+    (strong color index, strong side wins, plies to mate or None).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = []
+        # piece type => (wdl, dtm or None)
+        self.tables = {}
+        for name in TABLES:
+            wdl = self._map(os.path.join(directory, name + '.wdl'), TABLE_SIZE >> 3)
+            if wdl is not None:
+                self.tables[TABLE_PIECES[name]] = (wdl, self._map(os.path.join(directory, name + '.dtm'), TABLE_SIZE))
+
+    def _map(self, path, size):
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            return None
+        file = open(path, 'rb')
+        self.files.append(file)
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __bool__(self):
+        return bool(self.tables)
+
+    def close(self):
+        for wdl, dtm in self.tables.values():
+            wdl.close()
+            if dtm is not None:
+                dtm.close()
+        for file in self.files:
+            file.close()
+        self.tables = {}
+        self.files = []
+
+    def probe(self, board):
+        if popcount(board.occupied) != 3 or board.castling_rights:
+            return None
+        # The one piece besides the kings decides the table, and its color the strong side
+        bitboards = board.bitboards
+        for code in (PAWN, ROOK, QUEEN, 6 + PAWN, 6 + ROOK, 6 + QUEEN):
+            if bitboards[code]:
+                break
+        else:
+            return None
+        tables = self.tables.get(code % 6)
+        if tables is None:
+            return None
+
+        strong = code // 6
+        strong_king = board.king_squares[strong]
+        weak_king = board.king_squares[1 - strong]
+        piece = bitboards[code].bit_length() - 1
+        black_to_move = board.game_state.current_turn != ('white' if strong == WHITE else 'black')
+        if strong == BLACK:
+            strong_king ^= FLIP
+            weak_king ^= FLIP
+            piece ^= FLIP
+        index = table_index(black_to_move, strong_king, weak_king, piece)
+
+        wdl, dtm = tables
+        if not wdl[index >> 3] >> (index & 7) & 1:
+            return strong, False, None
+        return strong, True, dtm[index] - 1 if dtm is not None else None
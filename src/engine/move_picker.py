@@ -0,0 +1,112 @@
+# engine/move_picker.py
+#
+# Staged move ordering: a node's moves are handed out best-first a stage at a
+# time, so a cutoff on the first few moves never pays for generating or
+# sorting the rest.
+#
+#   1. the hash move (from the transposition table or the previous PV)
+#   2. captures that do not lose material by static exchange evaluation,
+#      most valuable victim / least valuable attacker first
+#   3. the two killer moves of this ply, then the counter-move to the opponent's last move
+#   4. the other quiet moves by butterfly history (promotions first)
+#   5. the captures that lose material, in the same order as in stage 2
+
+from src.board.bitboard import PIECE_TYPES, PAWN
+from src.board.move import CAPTURE_BIT, PROMOTION_BIT, PROMOTION_PIECES
+from src.board.piece_square import PIECE_VALUES
+from src.engine.see import see, SEE_VALUES
+
+# MVV_LVA[victim type][attacker type]: the victim decides, the cheaper attacker breaks ties
+MVV_LVA = [[PIECE_VALUES[victim] * 8 - attacker for attacker in range(len(PIECE_TYPES))]
+           for victim in PIECE_TYPES]
+
+# Extra order score for a promotion, by the move's two low flag bits (knight ... queen)
+PROMOTION_SCORES = [PIECE_VALUES[piece] * 8 for piece in PROMOTION_PIECES]
+
+# Quiet promotions go before every quiet move however good its history
+QUIET_PROMOTION_BONUS = 1 << 40
+
+
+def capture_score(squares, move):
+    victim = squares[(move >> 6) & 63]
+    # En passant is the one capture whose victim is not on the target square
+    score = MVV_LVA[PAWN if victim is None else victim % 6][squares[move & 63] % 6]
+    if move & PROMOTION_BIT:
+        score += PROMOTION_SCORES[(move >> 12) & 3]
+    return score
+
+
+def quiet_score(history, move):
+    if move & PROMOTION_BIT:
+        return QUIET_PROMOTION_BONUS + PROMOTION_SCORES[(move >> 12) & 3]
+    return history[move & 4095]
+
+
+def order_moves(squares, history, moves):
+    # Sort a mixed list in place the way the stages would hand it out: captures, then quiets
+    moves.sort(key=lambda move: (1, capture_score(squares, move)) if move & CAPTURE_BIT
+               else (0, quiet_score(history, move)), reverse=True)
+    return moves
+
+
+class MovePicker:
+    """
+    Iterates over the legal moves of one node in staged order.
+
+    killers and counter_move are only suggestions; like the hash move they are
+    played only if legal here, and never twice. history is the side to move's
+    64 x 64 butterfly table, indexed by move & 4095 (from + 64 * to).
+    captures and quiets are lists to generate into, reused per ply.
+    """
+
+    def __init__(self, board, color, hash_move=0, killers=(), counter_move=0, history=None,
+                 captures=None, quiets=None):
+        self.board = board
+        self.color = color
+        self.hash_move = hash_move
+        self.killers = killers
+        self.counter_move = counter_move
+        self.history = history
+        self.captures = captures if captures is not None else []
+        self.quiets = quiets if quiets is not None else []
+
+    def __iter__(self):
+        board = self.board
+        generator = board.move_generator
+        color = self.color
+        hash_move = self.hash_move
+
+        if hash_move and generator.is_legal(hash_move, color):
+            yield hash_move
+
+        squares = board.squares
+        captures = generator.legal_moves(color, captures_only=True, moves=self.captures)
+        if len(captures) > 1:
+            captures.sort(key=lambda move: capture_score(squares, move), reverse=True)
+        losing_captures = []
+        for move in captures:
+            if move == hash_move:
+                continue
+            # Taking something worth at least the capturing piece cannot lose; anything else is looked into
+            victim = squares[(move >> 6) & 63]
+            if (victim is not None and SEE_VALUES[victim % 6] < SEE_VALUES[squares[move & 63] % 6]
+                    and see(board, move) < 0):
+                losing_captures.append(move)
+            else:
+                yield move
+
+        quiets = generator.legal_moves(color, moves=self.quiets, quiets_only=True)
+        played = [hash_move]
+        for move in (*self.killers, self.counter_move):
+            if move and move not in played and move in quiets:
+                played.append(move)
+                yield move
+
+        history = self.history
+        if len(quiets) > 1:
+            quiets.sort(key=lambda move: quiet_score(history, move), reverse=True)
+        for move in quiets:
+            if move not in played:
+                yield move
+
+        yield from losing_captures
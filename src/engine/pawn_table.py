@@ -0,0 +1,44 @@
+# engine/pawn_table.py
+
+from array import array
+
+
+class PawnHashTable:
+    """
+    Fixed-size cache of pawn-structure scores keyed by ChessBoard.pawn_hash.
+
+    Pawn structure only changes when a pawn moves, is captured or promotes, so
+    most evaluations in a search share a handful of pawn skeletons.
+    """
+
+    ENTRY_BYTES = 16  # 8-byte key + two 4-byte scores
+
+    def __init__(self, size_mb=1):
+        entries = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.capacity = 1 << (entries.bit_length() - 1)
+        self.mask = self.capacity - 1
+        # Empty slots hold key 0 with zero scores, which is also the right answer
+        # for the one position that hashes to 0: no pawns on the board
+        self.keys = array('Q', bytes(8 * self.capacity))
+        self.white_scores = array('i', bytes(4 * self.capacity))
+        self.black_scores = array('i', bytes(4 * self.capacity))
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.white_scores[index], self.black_scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, white_score, black_score):
+        index = key & self.mask
+        self.keys[index] = key
+        self.white_scores[index] = white_score
+        self.black_scores[index] = black_score
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
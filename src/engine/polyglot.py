@@ -0,0 +1,177 @@
+# engine/polyglot.py
+#
+# Opening books in the Polyglot .bin format: 16-byte big-endian entries
+# (key, move, weight, learn) sorted by key, where key is the position's
+# Polyglot hash. Lookups binary-search a memory-mapped file, so opening even
+# a large book costs nothing and only the pages a search touches are read.
+
+import mmap
+import random
+import struct
+
+from src.board.bitboard import (
+    WHITE, PAWN, KING, ADJACENT_FILE_MASKS, RANK_MASKS, COLOR_INDEX, iter_bits
+)
+from src.board.move import PROMOTION_BIT, KING_CASTLE, QUEEN_CASTLE
+from src.engine.polyglot_random import POLYGLOT_RANDOM
+
+ENTRY = struct.Struct('>QHHI')
+ENTRY_SIZE = ENTRY.size
+
+# Polyglot numbers ranks from white's side, this board from black's: flipping
+# the row turns a square into Polyglot's numbering and back
+FLIP = 56
+
+# PIECE_KEYS[code][sq]: Polyglot orders pieces black pawn, white pawn, black knight, ...
+PIECE_KEYS = [[POLYGLOT_RANDOM[64 * (2 * (code % 6) + (1 - code // 6)) + (sq ^ FLIP)] for sq in range(64)]
+              for code in range(12)]
+# White kingside, white queenside, black kingside, black queenside, as in bitboard.py's rights
+CASTLING_KEYS = POLYGLOT_RANDOM[768:772]
+EN_PASSANT_KEYS = POLYGLOT_RANDOM[772:780]
+WHITE_TO_MOVE_KEY = POLYGLOT_RANDOM[780]
+
+
+def polyglot_key(board):
+    key = 0
+    for code, bitboard in enumerate(board.bitboards):
+        keys = PIECE_KEYS[code]
+        for sq in iter_bits(bitboard):
+            key ^= keys[sq]
+    for index in range(4):
+        if board.castling_rights & (1 << index):
+            key ^= CASTLING_KEYS[index]
+
+    us = COLOR_INDEX[board.game_state.get_current_turn()]
+    if board.last_double_pawn_move:
+        # Only when a pawn of the side to move stands beside the one that just moved two squares
+        row, col = board.last_double_pawn_move
+        if board.bitboards[us * 6 + PAWN] & ADJACENT_FILE_MASKS[col] & RANK_MASKS[row]:
+            key ^= EN_PASSANT_KEYS[col]
+    if us == WHITE:
+        key ^= WHITE_TO_MOVE_KEY
+    return key
+
+
+def encode_move(move):
+    # A 16-bit board move in Polyglot's encoding: castling is written as the king taking its own rook
+    start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+    if flag == KING_CASTLE:
+        end = (start & ~7) | 7
+    elif flag == QUEEN_CASTLE:
+        end = start & ~7
+    encoded = (end ^ FLIP) | ((start ^ FLIP) << 6)
+    if move & PROMOTION_BIT:
+        encoded |= ((flag & 3) + 1) << 12
+    return encoded
+
+
+def decode_move(board, encoded, legal_moves):
+    # The legal board move a Polyglot move stands for, or None
+    start = ((encoded >> 6) & 63) ^ FLIP
+    end = (encoded & 63) ^ FLIP
+    promotion = (encoded >> 12) & 7
+    king = board.squares[start]
+    if king is not None and king % 6 == KING and start >> 3 == end >> 3 and abs((start & 7) - (end & 7)) > 1:
+        # King takes rook: the real target is two squares towards the rook
+        end = start + 2 if end > start else start - 2
+    for move in legal_moves:
+        if move & 4095 != start | (end << 6):
+            continue
+        if not promotion or (move & PROMOTION_BIT and (move >> 12) & 3 == promotion - 1):
+            return move
+    return None
+
+
+class PolyglotBook:
+    """
+    A read-only Polyglot book, memory-mapped.
+
+    entries(board) lists the book's moves for a position as (move, weight)
+    pairs, with 16-bit board moves that are legal there; choose(board) picks
+    one at random in proportion to the weights, or returns None when the
+    position is not in the book.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        self.length = size // ENTRY_SIZE
+        # An empty file cannot be mapped, and has nothing to find anyway
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.length else b''
+        self.random = random.Random()
+
+    def close(self):
+        if self.length:
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.length
+
+    def _key_at(self, index):
+        return ENTRY.unpack_from(self.data, index * ENTRY_SIZE)[0]
+
+    def _lower_bound(self, key):
+        # Index of the first entry whose key is not below key
+        low, high = 0, self.length
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def raw_entries(self, key):
+        # (move, weight, learn) of every entry for key, in file order
+        entries = []
+        index = self._lower_bound(key)
+        while index < self.length:
+            entry_key, move, weight, learn = ENTRY.unpack_from(self.data, index * ENTRY_SIZE)
+            if entry_key != key:
+                break
+            entries.append((move, weight, learn))
+            index += 1
+        return entries
+
+    def entries(self, board):
+        raw = self.raw_entries(polyglot_key(board))
+        if not raw:
+            return []
+        legal_moves = board.move_generator.legal_moves(board.game_state.get_current_turn())
+        entries = []
+        for encoded, weight, _ in raw:
+            move = decode_move(board, encoded, legal_moves)
+            if move is not None:
+                entries.append((move, weight))
+        return entries
+
+    def choose(self, board):
+        entries = [(move, weight) for move, weight in self.entries(board) if weight > 0]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return self.random.choices(moves, weights)[0]
+
+
+def write_book(path, weights):
+    """
+    Write a Polyglot book. weights maps each Polyglot key to a dict of
+    {encoded move: weight}. Moves of zero weight are left out, and weights
+    are scaled down together if the largest would not fit in 16 bits.
+    """
+    largest = max((weight for moves in weights.values() for weight in moves.values()), default=0)
+    scale = 65535 / largest if largest > 65535 else 1
+    with open(path, 'wb') as book:
+        for key in sorted(weights):
+            moves = weights[key]
+            for move in sorted(moves, key=moves.get, reverse=True):
+                if moves[move] > 0:
+                    book.write(ENTRY.pack(key, move, max(int(moves[move] * scale), 1), 0))
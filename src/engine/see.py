@@ -0,0 +1,63 @@
+# engine/see.py
+#
+# Static exchange evaluation: the material a capture wins or loses once both
+# sides have recaptured on its target square for as long as it pays, without
+# playing any move. Pieces behind the ones that have already captured (x-rays)
+# join in as the square's attackers are found again on the emptied board.
+
+from src.board.bitboard import PAWN, KING, PIECE_TYPES
+from src.board.move import EN_PASSANT, PROMOTION
+from src.board.piece_square import PIECE_VALUES
+
+# Exchange values by piece type index; the king is worth more than anything it could take
+SEE_VALUES = [PIECE_VALUES[piece_type] for piece_type in PIECE_TYPES]
+
+
+def see(board, move):
+    """
+    Material balance of move for the side making it, in centipawns, assuming
+    each side always recaptures with its least valuable attacker and stops
+    as soon as going on would lose more. Pins are ignored.
+    """
+    start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+    squares = board.squares
+    bitboards = board.bitboards
+    attacker = squares[start]
+    occupied = board.occupied ^ (1 << start)
+
+    if flag == EN_PASSANT:
+        occupied ^= 1 << ((start & ~7) | (end & 7))
+        gains = [SEE_VALUES[PAWN]]
+    else:
+        victim = squares[end]
+        gains = [SEE_VALUES[victim % 6] if victim is not None else 0]
+
+    # Value of the piece now standing on the target square, which the next capture takes
+    if flag & PROMOTION:
+        on_square = SEE_VALUES[1 + (flag & 3)]
+        gains[0] += on_square - SEE_VALUES[PAWN]
+    else:
+        on_square = SEE_VALUES[attacker % 6]
+
+    side = 1 - attacker // 6
+    while True:
+        attackers = board.attackers_to(end, side, occupied) & occupied
+        if not attackers:
+            break
+        base = side * 6
+        for piece_type in range(6):
+            candidates = attackers & bitboards[base + piece_type]
+            if candidates:
+                break
+        if piece_type == KING and board.attackers_to(end, 1 - side, occupied) & occupied:
+            # The king may only take last, when nothing defends the square any more
+            break
+        gains.append(on_square - gains[-1])
+        occupied ^= candidates & -candidates
+        on_square = SEE_VALUES[piece_type]
+        side = 1 - side
+
+    # Back up the exchange: either side may decline to go on capturing
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
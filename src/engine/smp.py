@@ -0,0 +1,202 @@
+# engine/smp.py
+#
+# Lazy SMP: several processes search the same root through one shared
+# transposition table, and the deepest iteration any of them completes is
+# played. Workers differ in the depths they iterate over and in the small
+# random history scores their move ordering starts from, so each mostly runs
+# into positions the others have not stored yet.
+#
+# The worker processes outlive a search: a WorkerPool starts them once and
+# hands each new root to the same processes, so a move does not pay for
+# starting Python, building a ChessAI and attaching the table again.
+
+import multiprocessing
+import random
+import time
+from multiprocessing.connection import wait
+
+# Seconds a stopped worker gets to report its last iteration before it is replaced
+STOP_GRACE = 1.0
+
+
+def _reset_move_ordering(ai):
+    # Enough to reorder quiet moves nothing has been learned about yet, and soon outweighed by what is
+    ai.history = [[random.randrange(4) for _ in range(4096)] for _ in ai.history]
+    ai.counter_moves = [0] * 4096
+    for killers in ai.killers:
+        killers[0] = killers[1] = 0
+
+
+def _worker_loop(worker_id, hash_name, bitbase_dir, connection, stop_event):
+    from src.chess_ai import ChessAI
+
+    random.seed(worker_id)
+    ai = ChessAI('white', shared_hash=hash_name, verbose=False, bitbase_dir=bitbase_dir)
+    ai.stop_event = stop_event
+    # Odd workers stay one ply ahead of the even ones the whole way
+    offset = worker_id % 2
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            task = None
+        if task is None:
+            break
+        board, color, max_time, max_depth, max_nodes, selectivity = task
+        ai.color = color
+        ai.null_move_pruning, ai.late_move_reductions, ai.futility_pruning = selectivity
+        _reset_move_ordering(ai)
+        # Each worker may run to the hard limit; the controller stops them all once the plan is used up
+        ai.time_manager.start(max_time)
+        ai.max_nodes = max_nodes
+        ai.nodes = 0
+
+        def report(depth, move, value, pv):
+            connection.send((depth, move, value, pv, ai.nodes))
+
+        ai.iterative_deepening(board, range(1 + offset, max_depth + 1), report)
+        connection.send((None, None, None, None, ai.nodes))
+
+    ai.transposition_table.close()
+    if ai.bitbases:
+        ai.bitbases.close()
+
+
+class WorkerPool:
+    """
+    Search processes for one ChessAI, kept across searches.
+
+    search() runs them all on a root and returns the move of the deepest
+    completed iteration. Each worker talks to the controller over its own
+    pipe, so one that dies shows up as the end of that pipe: it is counted out
+    of the search it was in and started again before the next one.
+    """
+
+    def __init__(self, threads, hash_name, bitbase_dir):
+        # Workers are never forked straight from this process: a front end blocked reading stdin
+        # on another thread holds locks the child would inherit and then wait on forever
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.context = multiprocessing.get_context(start_method)
+        self.hash_name = hash_name
+        self.bitbase_dir = bitbase_dir
+        self.stop_event = self.context.Event()
+        self.workers = [None] * threads
+        self.connections = [None] * threads
+        for worker_id in range(threads):
+            self._start_worker(worker_id)
+
+    def _start_worker(self, worker_id):
+        connection, worker_end = self.context.Pipe()
+        worker = self.context.Process(target=_worker_loop, daemon=True,
+                                      args=(worker_id, self.hash_name, self.bitbase_dir, worker_end,
+                                            self.stop_event))
+        worker.start()
+        # Only the worker holds its end now, so the pipe closes when the worker dies
+        worker_end.close()
+        self.workers[worker_id] = worker
+        self.connections[worker_id] = connection
+
+    def _stop_worker(self, worker_id):
+        worker = self.workers[worker_id]
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+        self.connections[worker_id].close()
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass  # Already gone
+        for worker_id, worker in enumerate(self.workers):
+            worker.join(timeout=STOP_GRACE)
+            self._stop_worker(worker_id)
+        self.workers = []
+        self.connections = []
+
+    def _receive(self, busy, timeout):
+        # (worker id, message) for every busy worker that has sent one; a dead worker's message is None
+        messages = []
+        for connection in wait([self.connections[worker_id] for worker_id in busy], timeout):
+            worker_id = self.connections.index(connection)
+            try:
+                messages.append((worker_id, connection.recv()))
+            except (EOFError, OSError):
+                messages.append((worker_id, None))
+        return messages
+
+    def search(self, ai, board, max_depth, max_nodes, report):
+        time_manager = ai.time_manager
+        for worker_id, worker in enumerate(self.workers):
+            if not worker.is_alive():
+                self._stop_worker(worker_id)
+                self._start_worker(worker_id)
+        self.stop_event.clear()
+
+        # A node limit is for the whole search: each worker gets its share
+        worker_nodes_limit = max(1, max_nodes // len(self.workers)) if max_nodes is not None else None
+        task = (board, ai.color, time_manager.remaining(), max_depth, worker_nodes_limit,
+                (ai.null_move_pruning, ai.late_move_reductions, ai.futility_pruning))
+        # Workers still on this search; one leaves with its last message, or when it dies
+        busy = set()
+        for worker_id, connection in enumerate(self.connections):
+            try:
+                connection.send(task)
+                busy.add(worker_id)
+            except OSError:
+                pass
+
+        best_move, best_depth = None, 0
+        worker_nodes = [0] * len(self.workers)
+        try:
+            while busy:
+                # A little grace past the hard limit for the workers' own last reports
+                if time_manager.remaining() < -0.5 or (ai.stop_event is not None and ai.stop_event.is_set()):
+                    break
+                # Past the planned time any finished iteration will do; the workers are mid-search anyway
+                if best_move is not None and time_manager.elapsed() >= time_manager.soft_limit:
+                    break
+                for worker_id, message in self._receive(busy, 0.1):
+                    if message is None:
+                        busy.discard(worker_id)
+                        continue
+                    depth, move, value, pv, nodes = message
+                    worker_nodes[worker_id] = nodes
+                    ai.nodes = sum(worker_nodes)
+                    if depth is None:
+                        busy.discard(worker_id)
+                    elif depth > best_depth:
+                        time_manager.iteration_done(best_move is not None and move != best_move)
+                        best_move, best_depth = move, depth
+                        report(depth, best_move, value, pv)
+        finally:
+            self.stop_event.set()
+            self._wait_idle(busy)
+
+        return best_move
+
+    def _wait_idle(self, busy):
+        # Let every worker finish the stopped search, so none is still on it when the next one starts
+        deadline = time.monotonic() + STOP_GRACE
+        while busy and time.monotonic() < deadline:
+            for worker_id, message in self._receive(busy, 0.05):
+                if message is None or message[0] is None:
+                    busy.discard(worker_id)
+        for worker_id in busy:
+            # Stuck past the grace period, or dead: replaced before the next search
+            self._stop_worker(worker_id)
+            self._start_worker(worker_id)
+
+
+def parallel_search(ai, board, max_depth, max_nodes, report):
+    """
+    Run ai.threads worker processes on board and return the move of the deepest
+    completed iteration, calling report(depth, move, value, pv) each time a deeper one arrives.
+    ai.time_manager, already started, decides when the search is over.
+    """
+    if ai.worker_pool is None:
+        ai.worker_pool = WorkerPool(ai.threads, ai.transposition_table.name,
+                                    ai.bitbases.directory if ai.bitbases else None)
+    return ai.worker_pool.search(ai, board, max_depth, max_nodes, report)
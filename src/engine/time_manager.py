@@ -0,0 +1,85 @@
+# engine/time_manager.py
+
+import time
+
+# Seconds held back from every move for process and GUI overhead
+MOVE_OVERHEAD = 0.05
+
+# Moves the remaining clock is spread over when the time control does not say
+DEFAULT_MOVES_TO_GO = 30
+
+# Never plan to spend more than this share of the clock on one move
+MAX_CLOCK_SHARE = 0.5
+
+# The hard limit allows this many times the planned (soft) time
+HARD_LIMIT_FACTOR = 4.0
+
+# How much longer the next iteration is expected to take than the last one
+ITERATION_GROWTH = 2.5
+
+# Extra soft time, as a share of the original plan, each time the best move changes
+INSTABILITY_EXTENSION = 0.5
+
+
+class TimeManager:
+    """
+    Decides how long a search may take, on the monotonic clock.
+
+    The soft limit is the time planned for the move: no new iteration starts
+    after it, nor one that would not be done before the hard limit. The hard
+    limit stops the search wherever it is. When the best move changes between
+    iterations the soft limit is extended, since the position is less settled
+    than it looked.
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.soft_limit = self.hard_limit = self.planned = float('inf')
+        self.last_iteration_done = self.start_time
+        self.last_iteration_time = 0.0
+
+    def start(self, move_time=None, time_left=None, increment=0.0, moves_to_go=None):
+        """
+        Begin timing a search. All times are in seconds.
+
+        move_time fixes the time for this move. Otherwise time_left (the
+        side to move's clock), increment and moves_to_go give the budget.
+        Without either the search is unlimited, for a depth or node limit.
+        """
+        self.start_time = self.last_iteration_done = time.monotonic()
+        self.last_iteration_time = 0.0
+
+        if move_time is not None:
+            self.soft_limit = self.hard_limit = max(move_time, 0.01)
+        elif time_left is not None:
+            available = max(time_left - MOVE_OVERHEAD, 0.01)
+            budget = time_left / (moves_to_go or DEFAULT_MOVES_TO_GO) + increment * 0.75
+            self.hard_limit = max(min(budget * HARD_LIMIT_FACTOR, available * MAX_CLOCK_SHARE) - MOVE_OVERHEAD, 0.01)
+            self.soft_limit = min(max(budget - MOVE_OVERHEAD, 0.01), self.hard_limit)
+        else:
+            self.soft_limit = self.hard_limit = float('inf')
+        self.planned = self.soft_limit
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def remaining(self):
+        # Time left before the hard limit
+        return self.hard_limit - self.elapsed()
+
+    def hard_limit_reached(self):
+        return time.monotonic() - self.start_time >= self.hard_limit
+
+    def iteration_done(self, best_move_changed=False):
+        now = time.monotonic()
+        self.last_iteration_time = now - self.last_iteration_done
+        self.last_iteration_done = now
+        if best_move_changed:
+            self.soft_limit = min(self.soft_limit + self.planned * INSTABILITY_EXTENSION, self.hard_limit)
+
+    def can_start_iteration(self):
+        # Only if it is within the plan and expected to finish before the hard limit
+        elapsed = self.elapsed()
+        if elapsed >= self.soft_limit:
+            return False
+        return elapsed + self.last_iteration_time * ITERATION_GROWTH < self.hard_limit
@@ -0,0 +1,199 @@
+# engine/transposition.py
+
+from multiprocessing import shared_memory
+import weakref
+
+# Bound types; a zero data word marks an empty slot
+UPPER_BOUND, LOWER_BOUND, EXACT = 1, 2, 3
+
+# Mate scores count down with the distance to mate: mated at ply n scores -(MATE_VALUE - n)
+MATE_VALUE = 100000
+MATE_BOUND = MATE_VALUE - 1000
+
+
+def value_to_tt(value, ply):
+    # Mates are stored as distance from this node, so they stay valid wherever it is reached
+    if value >= MATE_BOUND:
+        return value + ply
+    if value <= -MATE_BOUND:
+        return value - ply
+    return value
+
+
+def value_from_tt(value, ply):
+    if value >= MATE_BOUND:
+        return value - ply
+    if value <= -MATE_BOUND:
+        return value + ply
+    return value
+
+
+# Scores are stored offset into the top 32 bits of the data word
+SCORE_OFFSET = 1 << 31
+SCORE_LIMIT = SCORE_OFFSET - 1
+
+# Two header words ahead of the entries: the current generation and the bucket mask
+HEADER_WORDS = 2
+
+
+def _release(view, shm, owner):
+    view.release()
+    if shm is not None:
+        shm.close()
+        if owner:
+            shm.unlink()
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table.
+
+    Each entry is two 64-bit words, key ^ data and data, where data packs the
+    move, depth, bound, generation and score. A reader only accepts an entry
+    whose words XOR back to its key, so a slot half-written by another process
+    reads as a miss instead of a wrong result, and no locks are needed.
+
+    Entries are grouped in buckets of two: the first slot prefers deeper or
+    current-search results, the second is always replaced. Each search starts a
+    new generation so results from earlier searches age out.
+
+    The table lives in a private buffer by default. create_shared() puts it in
+    named shared memory instead, and attach() maps an existing one by name, so
+    several processes can read and fill the same table.
+    """
+
+    BUCKET_SIZE = 2
+    ENTRY_BYTES = 16  # key ^ data, data
+
+    def __init__(self, size_mb=16):
+        self.name = None
+        self._shm = None
+        self._owner = False
+        self.resize(size_mb)
+
+    @classmethod
+    def create_shared(cls, size_mb=16, name=None):
+        table = cls.__new__(cls)
+        buckets = cls._bucket_count(size_mb)
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=8 * HEADER_WORDS + buckets * cls.BUCKET_SIZE * cls.ENTRY_BYTES)
+        table._map(shm, owner=True, size_mb=size_mb, buckets=buckets)
+        table._table[1] = buckets - 1
+        return table
+
+    @classmethod
+    def attach(cls, name):
+        table = cls.__new__(cls)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 every process that opens a segment also registers it for
+            # cleanup at exit, which would remove it from under its creator
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        buckets = memoryview(shm.buf).cast('Q')[1] + 1
+        table._map(shm, owner=False, size_mb=buckets * cls.BUCKET_SIZE * cls.ENTRY_BYTES / (1024 * 1024),
+                   buckets=buckets)
+        # Pick up the generation of the search the creator started
+        table.generation = table._table[0]
+        return table
+
+    @classmethod
+    def _bucket_count(cls, size_mb):
+        entries = max(cls.BUCKET_SIZE, int(size_mb * 1024 * 1024) // cls.ENTRY_BYTES)
+        return 1 << ((entries // cls.BUCKET_SIZE).bit_length() - 1)
+
+    def _map(self, shm, owner, size_mb, buckets):
+        self.name = shm.name
+        self._shm = shm
+        self._owner = owner
+        self.size_mb = size_mb
+        self.mask = buckets - 1
+        self.capacity = buckets * self.BUCKET_SIZE
+        self._table = memoryview(shm.buf).cast('Q')
+        self._finalizer = weakref.finalize(self, _release, self._table, shm, owner)
+        self.generation = 0
+        self._reset_counters()
+
+    def resize(self, size_mb):
+        if self._shm is not None:
+            raise ValueError("a shared transposition table cannot be resized")
+        buckets = self._bucket_count(size_mb)
+        self.size_mb = size_mb
+        self.mask = buckets - 1
+        self.capacity = buckets * self.BUCKET_SIZE
+        self.clear()
+
+    def clear(self):
+        if self._shm is None:
+            self._table = memoryview(bytearray(8 * (HEADER_WORDS + 2 * self.capacity))).cast('Q')
+        else:
+            self._shm.buf[8 * HEADER_WORDS:] = bytes(len(self._shm.buf) - 8 * HEADER_WORDS)
+        self._table[1] = self.mask
+        self.generation = 0
+        self._table[0] = 0
+        self._reset_counters()
+
+    def close(self):
+        # Drop this process's mapping; the creator also removes the shared segment
+        if self._shm is not None:
+            self._finalizer()
+
+    def _reset_counters(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 63
+        self._table[0] = self.generation
+
+    def probe(self, key):
+        """
+        Return (score, depth, bound, move) stored for key, or None. The move is
+        a 16-bit move (board/move.py), 0 when none was stored.
+        """
+        self.probes += 1
+        table = self._table
+        index = HEADER_WORDS + (key & self.mask) * 2 * self.BUCKET_SIZE
+        for word in (index, index + 2):
+            data = table[word + 1]
+            if data and table[word] ^ data == key:
+                self.hits += 1
+                return (data >> 32) - SCORE_OFFSET, (data >> 16) & 0xFF, (data >> 24) & 3, data & 0xFFFF
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        table = self._table
+        index = HEADER_WORDS + (key & self.mask) * 2 * self.BUCKET_SIZE
+        data = table[index + 1]
+        # Depth-preferred slot: take it over if it is ours, empty, stale or shallower
+        if not (not data or table[index] ^ data == key or ((data >> 26) & 63) != self.generation
+                or depth >= ((data >> 16) & 0xFF)):
+            index += 2
+        if not -SCORE_LIMIT < score < SCORE_LIMIT:
+            score = SCORE_LIMIT if score > 0 else -SCORE_LIMIT
+        data = ((move or 0) | (min(depth, 255) << 16) | (bound << 24) | (self.generation << 26)
+                | ((int(score) + SCORE_OFFSET) << 32))
+        table[index] = key ^ data
+        table[index + 1] = data
+        self.stores += 1
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def hashfull(self):
+        # Permille of sampled slots holding an entry from the current search (as UCI reports it)
+        sample = min(1000, self.capacity)
+        table = self._table
+        used = 0
+        for slot in range(sample):
+            data = table[HEADER_WORDS + 2 * slot + 1]
+            if data and ((data >> 26) & 63) == self.generation:
+                used += 1
+        return used * 1000 // sample
@@ -0,0 +1,137 @@
+# epd.py
+#
+# Runs an EPD test suite (WAC, STS, ...) through ChessAI and reports how many
+# positions it solves, how quickly and with how many nodes:
+#
+#   python -m src.epd suites/wac.epd --time 5
+#   python -m src.epd suites/sts1.epd --nodes 20000 --json report.json
+
+import argparse
+import json
+import re
+import sys
+import time
+
+from src.board.chess_board import ChessBoard
+from src.chess_ai import ChessAI
+from src.utils.helpers import move_to_san, move_to_uci, san_to_move
+
+OPERATION = re.compile(r'(\w+)\s*([^;]*);')
+
+
+def parse_epd(line):
+    """
+    Split one EPD record into (fen, operations). The four position fields get
+    default move counters; operations maps opcodes to their argument lists.
+    """
+    fields = line.split(None, 4)
+    fen = ' '.join(fields[:4]) + ' 0 1'
+    operations = {}
+    for opcode, operand in OPERATION.findall(fields[4] if len(fields) > 4 else ''):
+        operand = operand.strip()
+        if operand.startswith('"') and operand.endswith('"'):
+            operations[opcode] = [operand[1:-1]]
+        else:
+            operations[opcode] = operand.split()
+    return fen, operations
+
+
+def run_position(fen, operations, max_time, max_depth, max_nodes, hash_size_mb):
+    board = ChessBoard()
+    board.set_fen(fen)
+    best_moves = [san_to_move(board, san) for san in operations.get('bm', [])]
+    avoid_moves = [san_to_move(board, san) for san in operations.get('am', [])]
+
+    def solves(move):
+        if best_moves and move not in best_moves:
+            return False
+        return move not in avoid_moves
+
+    # Time to solution: when the search settled on a solving move and never left it again
+    progress = {'solved_at': None, 'depth': 0}
+
+    def on_iteration(depth, score, nodes, elapsed, pv):
+        progress['depth'] = depth
+        if solves(pv[0]):
+            if progress['solved_at'] is None:
+                progress['solved_at'] = elapsed
+        else:
+            progress['solved_at'] = None
+
+    ai = ChessAI(board.game_state.get_current_turn(), hash_size_mb, verbose=False, info_callback=on_iteration)
+    start = time.perf_counter()
+    move = ai.get_best_move(board, max_time, max_depth=max_depth, max_nodes=max_nodes)
+    elapsed = time.perf_counter() - start
+
+    solved = move is not None and solves(move)
+    return {
+        'id': operations.get('id', [''])[0],
+        'fen': fen,
+        'best_moves': operations.get('bm', []),
+        'avoid_moves': operations.get('am', []),
+        'move': move_to_san(board, move) if move else None,
+        'uci': move_to_uci(move) if move else None,
+        'solved': solved,
+        'time_to_solution': progress['solved_at'] if solved else None,
+        'time': elapsed,
+        'nodes': ai.nodes,
+        'depth': progress['depth'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an EPD test suite through the KingPin search")
+    parser.add_argument('suite', help="EPD file with bm/am and id operations")
+    parser.add_argument('--time', type=float, default=5.0, help="seconds per position")
+    parser.add_argument('--nodes', type=int, help="node budget per position (instead of a time limit)")
+    parser.add_argument('--depth', type=int, help="maximum search depth (default: as deep as the time allows)")
+    parser.add_argument('--hash', type=int, default=16, help="transposition table size in MB")
+    parser.add_argument('--json', help="write the machine-readable report to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    max_time = float('inf') if args.nodes else args.time
+    results = []
+    with open(args.suite) as suite:
+        for line in suite:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fen, operations = parse_epd(line)
+            result = run_position(fen, operations, max_time, args.depth, args.nodes, args.hash)
+            results.append(result)
+            if args.json != '-':
+                status = 'ok  ' if result['solved'] else 'FAIL'
+                expected = ' '.join(result['best_moves'])
+                if result['avoid_moves']:
+                    expected += ' not ' + ' '.join(result['avoid_moves'])
+                print(f"{status} {result['id'] or fen:<24} played {result['move'] or '-':<8} "
+                      f"expected {expected.strip():<12} {result['time']:6.2f}s {result['nodes']:>8} nodes")
+
+    solved = sum(1 for result in results if result['solved'])
+    total_time = sum(result['time'] for result in results)
+    total_nodes = sum(result['nodes'] for result in results)
+    summary = {
+        'suite': args.suite,
+        'positions': len(results),
+        'solved': solved,
+        'solve_rate': solved / len(results) if results else 0.0,
+        'total_time': total_time,
+        'total_nodes': total_nodes,
+        'nps': int(total_nodes / total_time) if total_time > 0 else 0,
+        'limits': {'time': None if args.nodes else args.time, 'nodes': args.nodes, 'depth': args.depth},
+    }
+
+    if args.json == '-':
+        json.dump({'summary': summary, 'positions': results}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"solved {solved}/{len(results)} ({summary['solve_rate']:.1%}) in {total_time:.1f}s, "
+              f"{total_nodes} nodes, {summary['nps']} nps")
+        if args.json:
+            with open(args.json, 'w') as report:
+                json.dump({'summary': summary, 'positions': results}, report, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
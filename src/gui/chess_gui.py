@@ -4,6 +4,7 @@ import os
 import threading
 import time
 from src.board.chess_board import ChessBoard
+from src.board.move_log import MoveLog
 from src.utils.helpers import parse_position
 from src.chess_ai import ChessAI
 
@@ -55,10 +56,12 @@ class ChessGUI:
             {'text': 'Restart', 'rect': pygame.Rect(230, board_size + 10, 100, 30)}
         ]
 
-        self.move_history = [self.chess_board.copy()]
-        self.current_move = 0
+        # Moves played so far; undo and redo step through it on the one board
+        self.move_log = MoveLog(self.chess_board)
 
-        self.ai = ChessAI('black')  
+        # An opening book is optional: build one with `python -m src.book build` and save it as assets/book.bin
+        book_path = os.path.join(self.base_path, 'assets', 'book.bin')
+        self.ai = ChessAI('black', book_path=book_path if os.path.exists(book_path) else None)
         self.ai_thinking = False
         self.ai_move = None
 
@@ -164,8 +167,9 @@ class ChessGUI:
     def get_valid_moves(self, pos):
         piece = self.chess_board.get_piece(pos)
         if piece and piece.color == self.chess_board.game_state.get_current_turn():
-            return [(r, c) for r in range(8) for c in range(8) 
-                    if self.chess_board.move_validator.is_valid_move(pos, (r, c))]
+            moves = self.chess_board.legal_moves(piece.color)
+            # Promotions show up once per piece type; one target square is enough here
+            return list({move[1] for move in moves if move[0] == pos})
         return []
     
     def check_game_over(self):
@@ -180,23 +184,18 @@ class ChessGUI:
         return None
     
     def undo_move(self):
-        if self.current_move > 0:
-            self.current_move -= 1
-            self.chess_board = self.move_history[self.current_move].copy()
+        if self.move_log.undo():
             self.arrows = []
-            print(f"Undo move. Current move: {self.current_move}")
+            print(f"Undo move. Current move: {self.move_log.current}")
 
     def redo_move(self):
-        if self.current_move < len(self.move_history) - 1:
-            self.current_move += 1
-            self.chess_board = self.move_history[self.current_move].copy()
+        if self.move_log.redo():
             self.arrows = []
-            print(f"Redo move. Current move: {self.current_move}")
+            print(f"Redo move. Current move: {self.move_log.current}")
 
     def restart_game(self):
         self.chess_board = ChessBoard()
-        self.move_history = [self.chess_board.copy()]
-        self.current_move = 0
+        self.move_log = MoveLog(self.chess_board)
         self.arrows = []
         self.selected_piece = None
         self.dragging = False
@@ -248,15 +247,12 @@ class ChessGUI:
                         end_pos = self.get_square_under_mouse()
                         if self.selected_piece != end_pos:
                             captured_piece = self.chess_board.get_piece(end_pos)
-                            move_made = self.chess_board.move_piece(self.selected_piece, end_pos)
+                            move_made = self.move_log.push(self.selected_piece, end_pos)
                             if move_made:
                                 if captured_piece:
                                     self.capture_sound.play()  # Play capture sound
                                 else:
                                     self.move_sound.play()  # Play move sound
-                                self.current_move += 1
-                                self.move_history = self.move_history[:self.current_move]
-                                self.move_history.append(self.chess_board.copy())
 
                                 game_state = self.check_game_over()
                                 if game_state:
@@ -292,12 +288,10 @@ class ChessGUI:
             pygame.display.flip()
 
             if not game_over and self.ai_move:
-                self.chess_board.move_piece(self.ai_move[0], self.ai_move[1])
+                promotion = self.ai_move[2] if len(self.ai_move) > 2 else 'queen'
+                self.move_log.push(self.ai_move[0], self.ai_move[1], promotion=promotion)
                 self.move_sound.play()
                 print(f"AI Move: {self.ai_move[0]} to {self.ai_move[1]}")
-                self.current_move += 1
-                self.move_history = self.move_history[:self.current_move]
-                self.move_history.append(self.chess_board.copy())
                 
                 game_state = self.check_game_over()
                 if game_state:
@@ -0,0 +1,86 @@
+# perft.py
+#
+# Move generation check and benchmark: counts the leaf nodes of the legal move
+# tree for the standard test positions and compares them with the published
+# numbers.
+#
+#   python -m src.perft                    # every position to depth 3
+#   python -m src.perft --depth 4 --position kiwipete
+#   python -m src.perft --fen "<fen>" --depth 3 --divide
+
+import argparse
+import sys
+import time
+
+from src.board.chess_board import ChessBoard
+from src.utils.helpers import move_to_uci
+
+# (name, FEN, node counts for depth 1, 2, 3, ...)
+POSITIONS = [
+    ('startpos', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+     [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487]),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def run_perft(fen, depth, divide=False):
+    board = ChessBoard()
+    board.set_fen(fen)
+    start = time.perf_counter()
+    if divide:
+        counts = board.divide(depth)
+        for move in sorted(counts, key=move_to_uci):
+            print(f"  {move_to_uci(move)}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = board.perft(depth)
+    return nodes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft node counts and speed for the KingPin move generator")
+    parser.add_argument('--depth', type=int, default=3, help="search depth (capped at the known counts per position)")
+    parser.add_argument('--position', choices=[name for name, _, _ in POSITIONS], help="run only this position")
+    parser.add_argument('--fen', help="run a custom position instead (no expected count)")
+    parser.add_argument('--divide', action='store_true', help="print the node count below each root move")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        runs = [('custom', args.fen, None, args.depth)]
+    else:
+        runs = [(name, fen, counts[min(args.depth, len(counts)) - 1], min(args.depth, len(counts)))
+                for name, fen, counts in POSITIONS if args.position in (None, name)]
+
+    failures = 0
+    total_nodes = total_time = 0
+    for name, fen, expected, depth in runs:
+        nodes, elapsed = run_perft(fen, depth, args.divide)
+        total_nodes += nodes
+        total_time += elapsed
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        if expected is None:
+            status = ''
+        elif nodes == expected:
+            status = 'ok'
+        else:
+            status = f'FAIL (expected {expected})'
+            failures += 1
+        print(f"{name:<10} depth {depth}: {nodes:>9} nodes {elapsed:8.2f}s {nps:>9} nps  {status}")
+
+    if len(runs) > 1 and total_time > 0:
+        print(f"{'total':<10}          {total_nodes:>9} nodes {total_time:8.2f}s {int(total_nodes / total_time):>9} nps")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,20 @@
+from src.board.bitboard import COLORS, PIECE_TYPES, PIECE_INDEX
+
+
 class ChessPiece:
+    """
+    Read-only view of a piece code (color * 6 + type, as in board/bitboard.py).
+
+    The board itself stores only the codes; get_piece() hands out the one
+    shared ChessPiece per code from PIECES, so views are never copied.
+    """
+
+    __slots__ = ('color', 'type', 'code')
+
     def __init__(self, color, piece_type):
         self.color = color
         self.type = piece_type
-        self.has_moved = False  # For pawns, kings, and rooks (castling)
+        self.code = PIECE_INDEX[color, piece_type]
 
     def __repr__(self):
         # 'knight' => 'n'
@@ -13,7 +25,21 @@ class ChessPiece:
         else:
             return f"{self.color[0]}{self.type[0]}"
 
+    def __eq__(self, other):
+        return isinstance(other, ChessPiece) and other.code == self.code
+
+    def __hash__(self):
+        return self.code
+
     def copy(self):
-        new_piece = ChessPiece(self.color, self.type)
-        new_piece.has_moved = self.has_moved
-        return new_piece
\ No newline at end of file
+        return self
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# One view per piece code
+PIECES = tuple(ChessPiece(color, piece_type) for color in COLORS for piece_type in PIECE_TYPES)
@@ -0,0 +1,231 @@
+# uci.py
+#
+# Headless UCI front end around ChessAI, so the engine can be driven by
+# tournament managers and test harnesses without opening a window:
+#
+#   python -m src.uci
+
+import sys
+import threading
+
+from src.board.chess_board import ChessBoard
+from src.chess_ai import ChessAI
+from src.engine.bitbase import DEFAULT_DIRECTORY as DEFAULT_BITBASE_DIRECTORY
+from src.engine.polyglot import PolyglotBook
+from src.engine.transposition import MATE_VALUE, MATE_BOUND
+from src.engine.time_manager import MOVE_OVERHEAD
+from src.utils.helpers import move_to_uci, uci_to_move
+
+ENGINE_NAME = 'KingPin'
+ENGINE_AUTHOR = 'the KingPin developers'
+
+
+def format_score(score):
+    # Centipawns, or moves to mate once the score is a forced mate
+    if abs(score) >= MATE_BOUND:
+        moves = (MATE_VALUE - abs(score) + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {int(score)}"
+
+
+class UCIEngine:
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()
+        self.hash_size_mb = 16
+        self.threads = 1
+        # UCI option name => ChessAI switch, all on by default
+        self.selectivity = {'nullmove': True, 'lmr': True, 'futility': True}
+        self.board = ChessBoard()
+        self.stop_event = threading.Event()
+        self.search_thread = None
+        self.ai = None
+        self._new_ai()
+
+    def _new_ai(self):
+        old_ai = self.ai
+        if old_ai:
+            if old_ai.worker_pool:
+                old_ai.worker_pool.close()
+            old_ai.transposition_table.close()
+        # The book and the bitbases stay open across Hash and Threads changes
+        self.ai = ChessAI('white', self.hash_size_mb, self.threads, verbose=False, info_callback=self._send_info,
+                          bitbase_dir=None if old_ai else DEFAULT_BITBASE_DIRECTORY)
+        self.ai.stop_event = self.stop_event
+        if old_ai:
+            self.ai.book = old_ai.book
+            self.ai.bitbases = old_ai.bitbases
+        self._apply_selectivity()
+
+    def _apply_selectivity(self):
+        self.ai.null_move_pruning = self.selectivity['nullmove']
+        self.ai.late_move_reductions = self.selectivity['lmr']
+        self.ai.futility_pruning = self.selectivity['futility']
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def run(self, lines=None):
+        for line in lines or sys.stdin:
+            if not self.handle(line):
+                break
+        self._stop_search()
+
+    def handle(self, line):
+        # Process one command; returns False on quit
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 16 min 1 max 4096")
+            self.send("option name Threads type spin default 1 min 1 max 256")
+            self.send("option name NullMove type check default true")
+            self.send("option name LMR type check default true")
+            self.send("option name Futility type check default true")
+            self.send("option name BookFile type string default <empty>")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self._stop_search()
+            self.ai.transposition_table.clear()
+            self.board = ChessBoard()
+        elif command == 'setoption':
+            self._stop_search()
+            self._set_option(args)
+        elif command == 'position':
+            self._stop_search()
+            self._set_position(args)
+        elif command == 'go':
+            self._stop_search()
+            self._go(args)
+        elif command == 'stop':
+            self._stop_search()
+        elif command == 'quit':
+            return False
+        return True
+
+    def _set_option(self, args):
+        # setoption name <name> [value <value>]; names may contain spaces
+        if 'name' not in args:
+            return
+        value_index = args.index('value') if 'value' in args else len(args)
+        name = ' '.join(args[args.index('name') + 1:value_index]).lower()
+        value = ' '.join(args[value_index + 1:])
+
+        if name in ('hash', 'threads'):
+            try:
+                size = max(1, int(value))
+            except ValueError:
+                # A bad value leaves the option as it was
+                self.send(f"info string invalid value for {name}: {value!r}")
+                return
+            if name == 'hash':
+                self.hash_size_mb = size
+            else:
+                self.threads = size
+            self._new_ai()
+        elif name == 'bookfile':
+            self._open_book(value)
+        elif name in self.selectivity:
+            self.selectivity[name] = value.lower() == 'true'
+            self._apply_selectivity()
+
+    def _open_book(self, path):
+        if self.ai.book:
+            self.ai.book.close()
+            self.ai.book = None
+        if path and path != '<empty>':
+            try:
+                self.ai.book = PolyglotBook(path)
+            except OSError as error:
+                self.send(f"info string cannot open book {path}: {error}")
+
+    def _set_position(self, args):
+        board = ChessBoard()
+        if args and args[0] == 'fen':
+            end = args.index('moves') if 'moves' in args else len(args)
+            try:
+                board.set_fen(' '.join(args[1:end]))
+            except (ValueError, IndexError) as error:
+                # A bad position leaves the previous one in place
+                self.send(f"info string {error}")
+                return
+        if 'moves' in args:
+            for text in args[args.index('moves') + 1:]:
+                try:
+                    move = uci_to_move(text)
+                except ValueError:
+                    self.send(f"info string illegal move {text}")
+                    break
+                promotion = move[2] if len(move) > 2 else 'queen'
+                if not board.move_piece(move[0], move[1], log=False, promotion=promotion):
+                    self.send(f"info string illegal move {text}")
+                    break
+        self.board = board
+
+    def _go(self, args):
+        limits = {}
+        infinite = False
+        i = 0
+        while i < len(args):
+            if args[i] == 'infinite':
+                infinite = True
+            elif args[i] in ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes'):
+                try:
+                    limits[args[i]] = int(args[i + 1])
+                    i += 1
+                except (ValueError, IndexError):
+                    # The limit is left out; a token that is not its value is read as the next one
+                    self.send(f"info string invalid value for {args[i]}")
+            i += 1
+
+        self.stop_event.clear()
+        self.search_thread = threading.Thread(target=self._search, args=(limits, infinite), daemon=True)
+        self.search_thread.start()
+
+    def _search(self, limits, infinite):
+        color = self.board.game_state.get_current_turn()
+        self.ai.color = color
+        # UCI times are in milliseconds; with no clock at all only depth, nodes or 'stop' end the search
+        move_time = time_left = None
+        increment = 0.0
+        if not infinite:
+            if 'movetime' in limits:
+                move_time = max(limits['movetime'] / 1000 - MOVE_OVERHEAD, 0.01)
+            elif ('wtime' if color == 'white' else 'btime') in limits:
+                time_left = limits['wtime' if color == 'white' else 'btime'] / 1000
+                increment = limits.get('winc' if color == 'white' else 'binc', 0) / 1000
+        move = self.ai.get_best_move(self.board, move_time, max_depth=limits.get('depth'),
+                                     max_nodes=limits.get('nodes'), time_left=time_left, increment=increment,
+                                     moves_to_go=limits.get('movestogo'))
+        if infinite:
+            # 'go infinite' may only answer once the GUI says stop
+            self.stop_event.wait()
+        self.send(f"bestmove {move_to_uci(move) if move else '0000'}")
+
+    def _stop_search(self):
+        if self.search_thread:
+            self.stop_event.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+    def _send_info(self, depth, score, nodes, elapsed, pv):
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        self.send(f"info depth {depth} score {format_score(score)} nodes {nodes} nps {nps} "
+                  f"hashfull {self.ai.transposition_table.hashfull()} time {int(elapsed * 1000)} "
+                  f"pv {' '.join(move_to_uci(move) for move in pv)}")
+
+
+def main():
+    UCIEngine().run()
+
+
+if __name__ == '__main__':
+    main()
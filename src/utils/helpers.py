@@ -1,4 +1,114 @@
 def parse_position(pos):
     col = ord(pos[0].lower()) - ord('a')
     row = 8 - int(pos[1])
-    return row, col
\ No newline at end of file
+    return row, col
+
+def format_position(position):
+    row, col = position
+    return chr(ord('a') + col) + str(8 - row)
+
+
+PROMOTION_LETTERS = {'queen': 'q', 'rook': 'r', 'bishop': 'b', 'knight': 'n'}
+PROMOTION_PIECES = {letter: piece for piece, letter in PROMOTION_LETTERS.items()}
+
+
+def move_to_uci(move):
+    # ((6, 4), (4, 4)) -> 'e2e4', ((1, 0), (0, 0), 'queen') -> 'a7a8q'
+    text = format_position(move[0]) + format_position(move[1])
+    if len(move) > 2:
+        text += PROMOTION_LETTERS[move[2]]
+    return text
+
+
+def uci_to_move(text):
+    if (len(text) not in (4, 5) or text[0] not in 'abcdefgh' or text[2] not in 'abcdefgh'
+            or text[1] not in '12345678' or text[3] not in '12345678'
+            or (len(text) == 5 and text[4].lower() not in PROMOTION_PIECES)):
+        raise ValueError(f"invalid UCI move {text!r}")
+    move = (parse_position(text[0:2]), parse_position(text[2:4]))
+    if len(text) > 4:
+        move += (PROMOTION_PIECES[text[4].lower()],)
+    return move
+
+
+PIECE_LETTERS = {'knight': 'N', 'bishop': 'B', 'rook': 'R', 'queen': 'Q', 'king': 'K'}
+
+
+def move_to_san(board, move):
+    # Standard algebraic notation for a legal move in the board's current position, e.g. 'Nbd7', 'exd6', 'O-O', 'Qxf7#'
+    start, end = move[0], move[1]
+    piece = board.get_piece(start)
+    if piece.type == 'king' and abs(start[1] - end[1]) == 2:
+        san = 'O-O' if end[1] == 6 else 'O-O-O'
+    else:
+        capture = board.get_piece(end) is not None or (piece.type == 'pawn' and start[1] != end[1])
+        if piece.type == 'pawn':
+            san = (format_position(start)[0] + 'x' if capture else '') + format_position(end)
+            if len(move) > 2:
+                san += '=' + PIECE_LETTERS[move[2]]
+        else:
+            san = PIECE_LETTERS[piece.type]
+            # Other pieces of the same kind that could also reach the target
+            rivals = [other[0] for other in board.legal_moves(piece.color)
+                      if other[1] == end and other[0] != start and board.get_piece(other[0]).type == piece.type]
+            if rivals:
+                square = format_position(start)
+                if all(rival[1] != start[1] for rival in rivals):
+                    san += square[0]
+                elif all(rival[0] != start[0] for rival in rivals):
+                    san += square[1]
+                else:
+                    san += square
+            if capture:
+                san += 'x'
+            san += format_position(end)
+
+    move_info = board.push_move_in_place(*move)
+    opponent = board.game_state.get_current_turn()
+    if board.game_rules.is_in_check(opponent):
+        san += '#' if not board.legal_moves(opponent) else '+'
+    board.pop_move_in_place(move_info)
+    return san
+
+
+def _normalize_san(san):
+    return san.replace('0', 'O').replace('=', '').rstrip('+#!?')
+
+
+SAN_PIECES = {letter: piece for piece, letter in PIECE_LETTERS.items()}
+
+
+def san_to_move(board, san):
+    # The legal move written as san in the board's current position, or None
+    text = _normalize_san(san)
+    legal_moves = board.legal_moves()
+    if text in ('O-O', 'O-O-O'):
+        for move in legal_moves:
+            if board.get_piece(move[0]).type == 'king' and abs(move[0][1] - move[1][1]) == 2:
+                if (move[1][1] == 6) == (text == 'O-O'):
+                    return move
+        return None
+
+    piece_type = SAN_PIECES.get(text[:1], 'pawn')
+    if piece_type != 'pawn':
+        text = text[1:]
+    promotion = None
+    if text[-1:].isalpha():
+        # Only a promotion ends in a letter rather than a rank
+        promotion = SAN_PIECES.get(text[-1].upper())
+        text = text[:-1]
+    if len(text) < 2 or text[-2] not in 'abcdefgh' or text[-1] not in '12345678':
+        return None
+    end = parse_position(text[-2:])
+    # Whatever is left between piece and target is the disambiguation, a file and/or a rank
+    hint = text[:-2].replace('x', '')
+
+    for move in legal_moves:
+        if move[1] != end or board.get_piece(move[0]).type != piece_type:
+            continue
+        if (move[2] if len(move) > 2 else None) != promotion:
+            continue
+        square = format_position(move[0])
+        if all(char in square for char in hint):
+            return move
+    return None